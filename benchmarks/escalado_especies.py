@@ -0,0 +1,88 @@
+"""
+Benchmark de escalado del balanceador según la cantidad de especies.
+
+Genera ecuaciones sintéticas con n especies (combustión de n - 3 combustibles orgánicos
+distintos, así que siempre tienen solución) y mide por separado cada etapa del pipeline:
+parseo, construcción de la matriz, formateo (variables, ecuaciones por elemento y ecuación
+balanceada) y, aparte, la resolución. Fuera del solver el costo por especie debería
+mantenerse casi constante.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.escalado_especies [n1 n2 ...]
+"""
+import sys
+import time
+
+from modules.balanceo import BalanceadorEcuacion, conteo_con_carga
+from modules.parser import limpiar_cache_parseo, parsear_ecuacion_completa
+
+# Familias de combustibles CkHm(O): (hidrógenos = 2k + desplazamiento, oxígenos, k mínimo)
+FAMILIAS = [(2, 0, 1), (0, 0, 2), (-2, 0, 2), (2, 1, 1)]
+TAMANOS = [50, 100, 200, 400, 800]
+REPETICIONES = 5
+
+
+def generar_ecuacion(num_especies):
+    """
+    Arma el texto de la combustión de num_especies - 3 combustibles distintos (alcanos,
+    alquenos, alquinos y alcoholes de cadena creciente) con O2, hacia CO2 y H2O.
+    """
+    combustibles = []
+    for i in range(num_especies - 3):
+        desplazamiento, oxigenos, minimo = FAMILIAS[i % len(FAMILIAS)]
+        k = i // len(FAMILIAS) + minimo
+        combustibles.append(f"C{k}H{2 * k + desplazamiento}" + ("O" * oxigenos))
+    return " + ".join(combustibles + ["O2"]) + " -> CO2 + H2O"
+
+
+def medir(funcion):
+    """Mejor tiempo (segundos) de REPETICIONES ejecuciones y el último resultado."""
+    mejor, resultado = float('inf'), None
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def etapas(texto):
+    """Mide cada etapa del pipeline para una ecuación."""
+    def parsear():
+        limpiar_cache_parseo()
+        return parsear_ecuacion_completa(texto)
+    t_parseo, (reactivos, productos) = medir(parsear)
+
+    def matriz():
+        balanceador = BalanceadorEcuacion([conteo_con_carga(e) for e in reactivos],
+                                          [conteo_con_carga(e) for e in productos])
+        return balanceador, balanceador.construir_matriz()
+    t_matriz, (balanceador, (matriz_a, elementos)) = medir(matriz)
+
+    # Un resultado vacío (triaje o sin solución) mediría otra cosa que el solver
+    if not balanceador.resolver():
+        motivo = balanceador.motivo_sin_solucion
+        raise ValueError(f"La ecuación de prueba no tiene solución: {motivo['motivo'] if motivo else 'sin_solucion'}")
+    t_solver, coeficientes = medir(lambda: balanceador.resolver())
+
+    def formatear():
+        # Instancia nueva para no aprovechar los textos ya armados en la medición anterior
+        nuevo = BalanceadorEcuacion(balanceador.reactivos, balanceador.productos)
+        nuevo.obtener_ecuacion_con_variables()
+        for i, elemento in enumerate(elementos):
+            nuevo.obtener_ecuacion_texto(elemento, matriz_a[i])
+        return nuevo.formatear_ecuacion_balanceada(coeficientes)
+    t_formato, _ = medir(formatear)
+    return t_parseo, t_matriz, t_formato, t_solver
+
+
+def main(tamanos):
+    print(f"{'especies':>8} {'parseo':>10} {'matriz':>10} {'formato':>10} {'us/especie':>11} {'solver':>10}")
+    for n in tamanos:
+        t_parseo, t_matriz, t_formato, t_solver = etapas(generar_ecuacion(n))
+        fuera_solver = t_parseo + t_matriz + t_formato
+        print(f"{n:>8} {t_parseo * 1e3:>8.2f}ms {t_matriz * 1e3:>8.2f}ms {t_formato * 1e3:>8.2f}ms "
+              f"{fuera_solver / n * 1e6:>11.1f} {t_solver * 1e3:>8.2f}ms")
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or TAMANOS)
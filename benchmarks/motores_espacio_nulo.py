@@ -0,0 +1,85 @@
+"""
+Benchmark de los motores de espacio nulo ('entero', 'modular', 'flotante').
+
+Mide calcular_espacio_nulo con cada motor (incluido el recurso al entero cuando un
+motor no certifica) sobre dos familias de matrices, con semilla fija:
+- estequiométricas: ecuaciones con n especies de fórmulas aleatorias sobre 20 elementos
+  (subíndices de 1 a 12), como las que llegan al balanceador;
+- densas: matrices f x 3f/2 con entradas uniformes en [-M, M], donde los coeficientes
+  del espacio nulo crecen rápido.
+Para cada caso muestra el motor más rápido y el que elige 'auto' (elegir_motor);
+los umbrales de elegir_motor se calibraron con esta tabla.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.motores_espacio_nulo
+"""
+import random
+import time
+
+import numpy as np
+
+from modules.balanceo import BalanceadorEcuacion, calcular_espacio_nulo, elegir_motor
+from modules.parser import parsear_ecuacion_completa
+
+ELEMENTOS = ['H', 'C', 'N', 'O', 'S', 'P', 'Fe', 'Cu', 'K', 'Na',
+             'Cl', 'Mg', 'Ca', 'Mn', 'Zn', 'Br', 'I', 'B', 'Si', 'Al']
+ESPECIES = [6, 12, 25, 50, 100, 200, 400, 800]
+DENSAS = [(10, 10), (10, 1000), (20, 10), (20, 100), (20, 1000), (25, 10), (30, 5000),
+          (40, 10), (40, 100), (40, 1000), (60, 1000)]
+MOTORES = ['entero', 'modular', 'flotante']
+REPETICIONES = 3
+
+
+def matriz_estequiometrica(num_especies, semilla=0):
+    """Matriz de composición de una ecuación con num_especies fórmulas aleatorias."""
+    azar = random.Random(semilla)
+    formulas = []
+    for _ in range(num_especies):
+        elementos = azar.sample(ELEMENTOS, azar.randint(1, 4))
+        formulas.append("".join(f"{e}{azar.randint(1, 12)}" for e in elementos))
+    mitad = num_especies // 2
+    reactivos, productos = parsear_ecuacion_completa(
+        " + ".join(formulas[:mitad]) + " -> " + " + ".join(formulas[mitad:]))
+    balanceador = BalanceadorEcuacion([e.conteo for e in reactivos], [e.conteo for e in productos])
+    return balanceador.construir_matriz()[0]
+
+
+def matriz_densa(num_filas, maximo, semilla=0):
+    """Matriz num_filas x 3·num_filas/2 con entradas uniformes en [-maximo, maximo]."""
+    azar = np.random.default_rng(semilla)
+    return azar.integers(-maximo, maximo + 1, size=(num_filas, num_filas * 3 // 2))
+
+
+def medir(matriz, motor):
+    """Mejor tiempo (segundos) de REPETICIONES ejecuciones y el motor que dio el resultado."""
+    mejor, usado = float('inf'), None
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        _, _, usado = calcular_espacio_nulo(matriz, motor)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, usado
+
+
+def fila_tabla(etiqueta, matriz):
+    """Mide los tres motores sobre una matriz e imprime una fila de la tabla."""
+    tiempos = {}
+    columnas = []
+    for motor in MOTORES:
+        tiempos[motor], usado = medir(matriz, motor)
+        # '*' marca que el motor no certificó y se usó el entero
+        columnas.append(f"{tiempos[motor] * 1e3:>9.2f}{'*' if usado != motor else ' '}")
+    print(f"{etiqueta:>14} {' '.join(columnas)} {min(tiempos, key=tiempos.get):>9} {elegir_motor(matriz):>9}")
+
+
+def main():
+    print(f"{'matriz':>14} " + " ".join(f"{m + ' ms':>10}" for m in MOTORES) + f" {'mejor':>9} {'auto':>9}")
+    for n in ESPECIES:
+        matriz = matriz_estequiometrica(n)
+        fila_tabla(f"{matriz.shape[0]}x{matriz.shape[1]}", matriz)
+    for num_filas, maximo in DENSAS:
+        matriz = matriz_densa(num_filas, maximo)
+        fila_tabla(f"{matriz.shape[0]}x{matriz.shape[1]} ±{maximo}", matriz)
+
+
+if __name__ == '__main__':
+    main()
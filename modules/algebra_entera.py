@@ -0,0 +1,203 @@
+from math import gcd
+
+
+def base_espacio_nulo(filas, num_columnas):
+    """
+    Calcula una base entera del espacio nulo de una matriz de enteros (lista de filas).
+    Lleva la matriz a forma escalonada reducida con eliminación sin fracciones
+    (cada fila se divide por el MCD de sus entradas para que los números no crezcan)
+    y arma un vector primitivo por cada columna libre. Devuelve (base, columnas_libres).
+    """
+    reducidas, pivotes = forma_escalonada_entera(filas, num_columnas)
+    return base_desde_escalonada(reducidas, pivotes, num_columnas)
+
+
+def base_desde_escalonada(reducidas, pivotes, num_columnas):
+    """
+    Arma la base entera del espacio nulo a partir de una forma escalonada reducida
+    (filas con pivote y su columna pivote). Devuelve (base, columnas_libres).
+    """
+    columnas_pivote = set(pivotes)
+    libres = [c for c in range(num_columnas) if c not in columnas_pivote]
+
+    base = []
+    for libre in libres:
+        # Escala común para que todas las variables pivote queden enteras
+        escala = 1
+        for fila, pivote in zip(reducidas, pivotes):
+            if fila[libre]:
+                d = abs(fila[pivote])
+                escala = escala * d // gcd(escala, d)
+
+        vector = [0] * num_columnas
+        vector[libre] = escala
+        for fila, pivote in zip(reducidas, pivotes):
+            if fila[libre]:
+                vector[pivote] = -fila[libre] * escala // fila[pivote]
+        base.append(vector_primitivo(vector))
+    return base, libres
+
+
+def forma_escalonada_entera(filas, num_columnas):
+    """
+    Forma escalonada reducida de una matriz entera sin usar fracciones.
+    Devuelve (filas_no_nulas, columnas_pivote); cada pivote es un entero no nulo
+    y su columna es cero en todas las demás filas.
+    """
+    filas = [list(fila) for fila in filas]
+    pivotes = []
+    r = 0
+    for c in range(num_columnas):
+        if r == len(filas):
+            break
+        # Se elige como pivote la entrada no nula de menor valor absoluto
+        candidatas = [i for i in range(r, len(filas)) if filas[i][c]]
+        if not candidatas:
+            continue
+        p = min(candidatas, key=lambda i: abs(filas[i][c]))
+        filas[r], filas[p] = filas[p], filas[r]
+        fila_pivote = filas[r]
+
+        for i in range(len(filas)):
+            if i != r and filas[i][c]:
+                filas[i] = _eliminar(filas[i], fila_pivote, c)
+
+        pivotes.append(c)
+        r += 1
+    return filas[:r], pivotes
+
+
+def vector_primitivo(vector):
+    """Divide un vector de enteros por el MCD de sus entradas."""
+    divisor = 0
+    for x in vector:
+        divisor = gcd(divisor, x)
+        if divisor == 1:
+            return vector
+    if divisor == 0:
+        return vector
+    return [x // divisor for x in vector]
+
+
+def es_solucion(filas, vector):
+    """Verifica exactamente (con enteros de Python) que A·x = 0."""
+    return all(sum(a * x for a, x in zip(fila, vector) if a) == 0 for fila in filas)
+
+
+def _eliminar(fila, fila_pivote, columna):
+    """Combina fila con fila_pivote (sin fracciones) para anular fila[columna]."""
+    a, b = fila_pivote[columna], fila[columna]
+    g = gcd(a, b)
+    fa, fb = a // g, b // g
+    return vector_primitivo([fa * x - fb * y for x, y in zip(fila, fila_pivote)])
+
+
+class FormaEscalonadaIncremental:
+    """
+    Forma escalonada reducida entera que se actualiza al agregar o quitar columnas
+    (especies) y filas (elementos) sin rehacer la eliminación completa.
+
+    Cada fila guarda [R | T], donde R = T·A es la forma reducida y T acumula las
+    operaciones de fila aplicadas a las restricciones originales. Con T se puede
+    reducir una columna nueva directamente (T·a) y saber de qué filas depende una
+    restricción que se quita. Las filas de R nulas se conservan: su parte T genera
+    el espacio nulo izquierdo (dependencias entre elementos).
+    """
+    def __init__(self, num_columnas=0):
+        self.num_columnas = num_columnas
+        self.num_restricciones = 0
+        self.filas = []
+        self.pivotes = []   # columna pivote de cada fila, o None si su parte R es nula
+
+    @classmethod
+    def desde_filas(cls, filas, num_columnas):
+        """Construye la forma reducida agregando las filas de la matriz una a una."""
+        forma = cls(num_columnas)
+        for fila in filas:
+            forma.agregar_fila(fila)
+        return forma
+
+    @property
+    def rango(self):
+        return sum(1 for pivote in self.pivotes if pivote is not None)
+
+    def base_espacio_nulo(self):
+        """Base entera del espacio nulo actual: (base, columnas_libres)."""
+        con_pivote = [(fila, pivote) for fila, pivote in zip(self.filas, self.pivotes) if pivote is not None]
+        return base_desde_escalonada([fila for fila, _ in con_pivote],
+                                     [pivote for _, pivote in con_pivote], self.num_columnas)
+
+    def agregar_fila(self, fila):
+        """Agrega una restricción (fila de A) al final; se reduce contra los pivotes existentes."""
+        for existente in self.filas:
+            existente.append(0)
+        nueva = list(fila) + [0] * self.num_restricciones + [1]
+        self.num_restricciones += 1
+
+        for existente, pivote in zip(self.filas, self.pivotes):
+            if pivote is not None and nueva[pivote]:
+                nueva = _eliminar(nueva, existente, pivote)
+        self.filas.append(nueva)
+        self.pivotes.append(None)
+        self._pivotear(len(self.filas) - 1)
+
+    def quitar_fila(self, indice):
+        """Quita la restricción original número 'indice' (en orden de agregado)."""
+        columna_t = self.num_columnas + indice
+        # Si alguna fila nula depende de la restricción, es redundante y el rango no cambia;
+        # si no, se quita una fila con pivote y su columna pasa a ser libre.
+        dependientes = [i for i, fila in enumerate(self.filas) if fila[columna_t]]
+        nulas = [i for i in dependientes if self.pivotes[i] is None]
+        elegida = nulas[0] if nulas else dependientes[0]
+
+        fila_elegida = self.filas[elegida]
+        for i in dependientes:
+            if i != elegida:
+                self.filas[i] = _eliminar(self.filas[i], fila_elegida, columna_t)
+
+        del self.filas[elegida]
+        del self.pivotes[elegida]
+        for fila in self.filas:
+            del fila[columna_t]
+        self.num_restricciones -= 1
+
+    def agregar_columna(self, posicion, columna):
+        """Inserta una columna (valores por restricción original) en la posición indicada."""
+        for fila in self.filas:
+            valor = sum(t * a for t, a in zip(fila[self.num_columnas:], columna) if t)
+            fila.insert(posicion, valor)
+        self.pivotes = [p + 1 if p is not None and p >= posicion else p for p in self.pivotes]
+        self.num_columnas += 1
+
+        # Si una fila nula obtiene una entrada en la columna nueva, el rango sube
+        for i, pivote in enumerate(self.pivotes):
+            if pivote is None and self.filas[i][posicion]:
+                self._pivotear(i)
+                break
+
+    def quitar_columna(self, posicion):
+        """Quita la columna de la posición indicada."""
+        if posicion in self.pivotes:
+            # La fila pierde su pivote: se busca otro en sus columnas libres
+            i = self.pivotes.index(posicion)
+            self.pivotes[i] = None
+            self._pivotear(i, excluir=posicion)
+
+        for fila in self.filas:
+            del fila[posicion]
+        self.pivotes = [p - 1 if p is not None and p > posicion else p for p in self.pivotes]
+        self.num_columnas -= 1
+
+    def _pivotear(self, i, excluir=None):
+        """Si la fila i tiene una entrada no nula en una columna libre, la vuelve pivote."""
+        fila = self.filas[i]
+        columnas_pivote = set(p for p in self.pivotes if p is not None)
+        candidatas = [c for c in range(self.num_columnas)
+                      if fila[c] and c != excluir and c not in columnas_pivote]
+        if not candidatas:
+            return
+        c = min(candidatas, key=lambda c: abs(fila[c]))
+        self.pivotes[i] = c
+        for h in range(len(self.filas)):
+            if h != i and self.filas[h][c]:
+                self.filas[h] = _eliminar(self.filas[h], fila, c)
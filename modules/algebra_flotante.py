@@ -0,0 +1,115 @@
+import numpy as np
+from fractions import Fraction
+from modules.algebra_entera import es_solucion
+from modules.algebra_modular import rango_modular
+
+# Denominador común máximo al recuperar los vectores enteros desde punto flotante
+MAX_DENOMINADOR = 10 ** 6
+
+
+def espacio_nulo_flotante(filas, num_columnas, max_denominador=MAX_DENOMINADOR):
+    """
+    Base entera del espacio nulo calculada en punto flotante con NumPy y certificada
+    de forma exacta. Pasos:
+    - Se eligen como columnas pivote las primeras linealmente independientes de A
+      (las mismas que la eliminación exacta); el resto son las columnas libres.
+    - Las variables pivote se obtienen para todas las columnas libres a la vez con
+      un único lstsq sobre la submatriz de pivotes (r columnas, r = rango).
+    - Cada vector se multiplica por el menor denominador común de sus coeficientes
+      (como máximo max_denominador) y se redondea a enteros primitivos.
+
+    El resultado solo se devuelve si A·x = 0 se cumple exactamente en enteros para
+    todos los vectores y el rango módulo un primo confirma la dimensión del espacio
+    nulo; así coincide con el de base_espacio_nulo. Devuelve (base, columnas_libres),
+    o None si la certificación falla (coeficientes grandes o matriz mal condicionada).
+    """
+    filas = [list(fila) for fila in filas]
+    if not filas:
+        libres = list(range(num_columnas))
+        return [[1 if j == libre else 0 for j in range(num_columnas)] for libre in libres], libres
+
+    matriz = np.array(filas, dtype=np.float64)
+    maximo_a = int(np.abs(matriz).max())
+    if maximo_a >= 2 ** 31:
+        # Fuera del rango que se puede certificar con rango_modular
+        return None
+
+    pivotes = _columnas_pivote(matriz)
+    # El rango exacto nunca es menor que el modular: si coinciden, la dimensión es correcta
+    if rango_modular(filas) != len(pivotes):
+        return None
+    columnas_pivote = set(pivotes)
+    libres = [c for c in range(num_columnas) if c not in columnas_pivote]
+    if not libres:
+        return [], []
+
+    # Una columna por variable libre: valores de las variables pivote con esa libre en 1
+    solucion = np.linalg.lstsq(matriz[:, pivotes], -matriz[:, libres], rcond=None)[0]
+    escalas = _denominadores_comunes(solucion, max_denominador)
+    if escalas is None:
+        return None
+    enteros = np.rint(solucion * escalas)
+    if np.abs(enteros).max(initial=0.0) >= 2 ** 53:
+        return None
+
+    base = np.zeros((num_columnas, len(libres)), dtype=np.int64)
+    base[pivotes] = enteros.astype(np.int64)
+    base[libres, np.arange(len(libres))] = escalas
+    base //= np.gcd.reduce(base, axis=0)
+
+    # Verificación exacta: con int64 si la cota descarta desbordes, si no con enteros de Python
+    maximo_x = int(np.abs(base).max())
+    if maximo_a * maximo_x * num_columnas < 2 ** 63:
+        if np.any(np.array(filas, dtype=np.int64) @ base):
+            return None
+        return base.T.tolist(), libres
+    base = base.T.tolist()
+    if not all(es_solucion(filas, vector) for vector in base):
+        return None
+    return base, libres
+
+
+def _columnas_pivote(matriz):
+    """
+    Recorre las columnas de izquierda a derecha y se queda con las que son linealmente
+    independientes de las anteriores (Gram-Schmidt con tolerancia relativa).
+    """
+    num_filas = matriz.shape[0]
+    ortonormales = np.empty((num_filas, 0))
+    pivotes = []
+    for c in range(matriz.shape[1]):
+        columna = matriz[:, c]
+        norma_original = np.linalg.norm(columna)
+        if norma_original == 0:
+            continue
+        v = columna - ortonormales @ (ortonormales.T @ columna)
+        norma = np.linalg.norm(v)
+        if norma > 1e-9 * norma_original:
+            ortonormales = np.column_stack((ortonormales, v / norma))
+            pivotes.append(c)
+            if len(pivotes) == num_filas:
+                break
+    return pivotes
+
+
+def _denominadores_comunes(solucion, max_denominador):
+    """
+    Para cada columna, la menor escala entera que vuelve (casi) enteros todos sus
+    valores. Solo se calcula la fracción de un valor no entero por columna y vuelta,
+    así que en el caso habitual (denominadores chicos) hay pocas iteraciones.
+    Devuelve un arreglo de escalas, o None si alguna supera max_denominador.
+    """
+    escalas = np.ones(solucion.shape[1], dtype=np.int64)
+    while True:
+        escalada = solucion * escalas
+        no_enteros = np.abs(escalada - np.rint(escalada)) > 1e-6 * np.maximum(1.0, np.abs(escalada))
+        columnas = np.nonzero(no_enteros.any(axis=0))[0]
+        if columnas.size == 0:
+            return escalas
+        for c, f in zip(columnas, no_enteros[:, columnas].argmax(axis=0)):
+            denominador = Fraction(float(escalada[f, c])).limit_denominator(max_denominador).denominator
+            if denominador == 1:
+                return None
+            escalas[c] *= denominador
+        if escalas.max() > max_denominador:
+            return None
@@ -0,0 +1,277 @@
+import numpy as np
+from itertools import islice
+from math import ceil, gcd, isqrt, log2
+from modules.algebra_entera import es_solucion
+
+# Primos menores que 2^31: el producto de dos residuos cabe en un int64 sin desbordar
+_LIMITE_PRIMOS = 2 ** 31
+
+
+def _es_primo(n):
+    """Test de Miller-Rabin determinista para n < 3.3e24 (más que suficiente para 2^31)."""
+    if n < 2:
+        return False
+    for p in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % p == 0:
+            return n == p
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    for a in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _generar_primos():
+    """Genera primos decrecientes a partir de 2^31."""
+    candidato = _LIMITE_PRIMOS - 1
+    while True:
+        if _es_primo(candidato):
+            yield candidato
+        candidato -= 2
+
+
+def _forma_escalonada_modular(matriz, p):
+    """
+    Forma escalonada reducida de una matriz int64 módulo el primo p, con operaciones
+    vectorizadas de NumPy. Devuelve (filas_pivote, columnas_pivote); cada pivote vale 1.
+    """
+    m = np.mod(matriz, p).astype(np.int64)
+    num_filas, num_columnas = m.shape
+    pivotes = []
+    r = 0
+    for c in range(num_columnas):
+        if r == num_filas:
+            break
+        no_nulas = np.nonzero(m[r:, c])[0]
+        if no_nulas.size == 0:
+            continue
+        p_fila = r + no_nulas[0]
+        if p_fila != r:
+            m[[r, p_fila]] = m[[p_fila, r]]
+        inverso = pow(int(m[r, c]), -1, p)
+        m[r] = (m[r] * inverso) % p
+
+        # Eliminar la columna c en todas las demás filas a la vez
+        factores = m[:, c].copy()
+        factores[r] = 0
+        filas = np.nonzero(factores)[0]
+        if filas.size:
+            m[filas] = (m[filas] - (factores[filas, None] * m[r]) % p) % p
+        pivotes.append(c)
+        r += 1
+    return m[:r], pivotes
+
+
+def rango_modular(filas, primo=_LIMITE_PRIMOS - 1):
+    """
+    Rango de una matriz entera módulo un primo (2^31 - 1 por defecto). Nunca supera
+    el rango exacto, así que sirve como cota inferior certificada.
+    """
+    if not filas:
+        return 0
+    matriz = np.array(filas, dtype=np.int64)
+    # La eliminación recorre columnas: en matrices anchas conviene reducir la transpuesta
+    if matriz.shape[1] > matriz.shape[0]:
+        matriz = matriz.T
+    _, pivotes = _forma_escalonada_modular(matriz, primo)
+    return len(pivotes)
+
+
+def _reconstruccion_racional(a, modulo):
+    """
+    Busca n/d con |n|, d <= sqrt(modulo / 2) y n = a * d (mod modulo).
+    Devuelve (n, d) o None si no existe.
+    """
+    limite = isqrt(modulo // 2)
+    r0, r1 = modulo, a % modulo
+    s0, s1 = 0, 1
+    while r1 > limite:
+        q = r0 // r1
+        r0, r1 = r1, r0 - q * r1
+        s0, s1 = s1, s0 - q * s1
+    if s1 == 0 or abs(s1) > limite:
+        return None
+    if s1 < 0:
+        r1, s1 = -r1, -s1
+    if gcd(r1, s1) != 1:
+        return None
+    return r1, s1
+
+
+def espacio_nulo_modular(filas, num_columnas, primos=3):
+    """
+    Base entera del espacio nulo calculada con aritmética modular y levantamiento
+    p-ádico (Dixon), todo en NumPy int64:
+    - Una eliminación módulo un primo p de 31 bits da las columnas pivote y un bloque
+      P (rango x rango) invertible de A; su inversa módulo p se calcula una sola vez.
+    - Las variables pivote X (P·X = -A[:, libres]) se levantan dígito a dígito en base p:
+      x_i = P^-1·b_i (mod p) y b_{i+1} = (b_i - P·x_i) / p, con enteros que nunca
+      superan int64.
+    - Con suficientes dígitos, cada vector se recupera con un denominador común por
+      reconstrucción racional.
+    Los vectores se verifican exactamente contra la matriz; la cantidad de dígitos se
+    duplica hasta la cota de Hadamard, que garantiza la reconstrucción. Si un primo
+    resulta malo (divide un menor) se prueba con el siguiente, hasta 'primos' primos.
+    Devuelve (base, columnas_libres) como la versión exacta, o None si no se logró
+    o las entradas son demasiado grandes para int64.
+    """
+    filas = [list(fila) for fila in filas]
+    if not filas:
+        libres = list(range(num_columnas))
+        return [[1 if j == libre else 0 for j in range(num_columnas)] for libre in libres], libres
+
+    matriz = np.array(filas, dtype=object)
+    maximo = int(np.abs(matriz).max())
+    # P·x_i suma a lo sumo 'filas' productos de una entrada por un dígito menor que 2^31
+    if maximo * len(filas) >= 2 ** 32:
+        return None
+    matriz = matriz.astype(np.int64)
+
+    necesarios = _digitos_necesarios(filas)
+    for p in islice(_generar_primos(), primos):
+        resultado = _espacio_nulo_p_adico(matriz, filas, p, necesarios)
+        if resultado is not None:
+            return resultado
+    return None
+
+
+def _espacio_nulo_p_adico(matriz, filas, p, necesarios):
+    """Intento de espacio_nulo_modular con el primo p; devuelve None si p es malo."""
+    num_columnas = matriz.shape[1]
+    _, pivotes = _forma_escalonada_modular(matriz, p)
+    columnas_pivote = set(pivotes)
+    libres = [c for c in range(num_columnas) if c not in columnas_pivote]
+    if not libres or not pivotes:
+        base = [[1 if j == libre else 0 for j in range(num_columnas)] for libre in libres]
+        return (base, libres) if son_soluciones(filas, base) else None
+
+    # Filas independientes del bloque de columnas pivote: juntas generan todas las filas de A
+    _, filas_pivote = _forma_escalonada_modular(np.ascontiguousarray(matriz[:, pivotes].T), p)
+    rango = len(pivotes)
+    if len(filas_pivote) != rango:
+        return None
+    bloque = matriz[np.ix_(filas_pivote, pivotes)]
+    aumentada = np.hstack([bloque, np.eye(rango, dtype=np.int64)])
+    reducida, pivotes_inversa = _forma_escalonada_modular(aumentada, p)
+    if pivotes_inversa != list(range(rango)):
+        return None
+    inversa = reducida[:, rango:]
+
+    b = -matriz[np.ix_(filas_pivote, libres)]
+    valores = np.zeros(b.shape, dtype=object)
+    modulo, digitos, objetivo = 1, 0, min(4, necesarios)
+    while True:
+        while digitos < objetivo:
+            x = _producto_modular(inversa, b % p, p)
+            b = (b - bloque @ x) // p
+            valores = valores + x.astype(object) * modulo
+            modulo *= p
+            digitos += 1
+        base = _reconstruir_base(valores, modulo, pivotes, libres, num_columnas)
+        if base is not None and son_soluciones(filas, base):
+            return base, libres
+        if digitos >= necesarios:
+            return None
+        objetivo = min(2 * digitos, necesarios)
+
+
+def _producto_modular(a, b, p):
+    """
+    a·b módulo p para matrices con entradas en [0, p), p < 2^31, sin desbordar int64:
+    a se parte en mitades de 16 bits y cada producto parcial se reduce por separado.
+    """
+    alta, baja = a >> 16, a & 0xFFFF
+    return (((alta @ b) % p << 16) + (baja @ b)) % p
+
+
+def son_soluciones(filas, base):
+    """
+    Verifica exactamente que A·x = 0 para todos los vectores de la base. Los vectores
+    se multiplican en int64 si caben y, si no, se parten en dígitos de 31 bits que se
+    multiplican por separado; solo la suma final de los productos usa enteros de Python.
+    """
+    if not base:
+        return True
+    maximo_a = max((abs(a) for fila in filas for a in fila), default=0)
+    if maximo_a * len(base[0]) >= 2 ** 32:
+        return all(es_solucion(filas, vector) for vector in base)
+    matriz = np.array(filas, dtype=np.int64)
+    maximo_x = max(abs(x) for vector in base for x in vector)
+    if maximo_a * maximo_x * len(base[0]) < 2 ** 63:
+        return not np.any(matriz @ np.array(base, dtype=np.int64).T)
+    restos = np.array(base, dtype=object).T
+    total = np.zeros((matriz.shape[0], len(base)), dtype=object)
+    desplazamiento = 0
+    while np.any(restos):
+        # Dígitos balanceados en [-2^30, 2^30) para que los negativos también lleguen a 0
+        digito = (restos + 2 ** 30) % 2 ** 31 - 2 ** 30
+        restos = (restos - digito) // 2 ** 31
+        digito = digito.astype(np.int64)
+        total = total + (matriz @ digito).astype(object) * (1 << desplazamiento)
+        desplazamiento += 31
+    return not np.any(total)
+
+
+def _digitos_necesarios(filas):
+    """
+    Cantidad de dígitos de 31 bits que asegura la reconstrucción racional: los
+    coeficientes son cocientes de menores acotados por la cota de Hadamard H
+    (producto de las normas de las filas), y hace falta un módulo mayor que 2·H².
+    """
+    bits_hadamard = 0.0
+    for fila in filas:
+        norma2 = sum(x * x for x in fila)
+        if norma2:
+            bits_hadamard += 0.5 * log2(norma2)
+    return max(1, ceil((2 * bits_hadamard + 2) / 30.9))
+
+
+def _reconstruir_base(valores, modulo, pivotes, libres, num_columnas):
+    """
+    Arma un vector entero primitivo por columna libre a partir de los valores de las
+    variables pivote módulo 'modulo' (filas pivote x columnas libres). Los valores de
+    una columna comparten denominador (el menor del bloque pivote), así que se busca un
+    denominador común D: mientras algún D·valor no sea chico se reconstruye ese valor
+    como fracción y D absorbe su denominador. Devuelve None si el módulo todavía no alcanza.
+    """
+    limite = isqrt(modulo // 2)
+    mitad = modulo // 2
+    base = []
+    for f, libre in enumerate(libres):
+        columna = valores[:, f]
+        denominador = 1
+        while True:
+            escalados = (columna * denominador) % modulo
+            escalados = np.where(escalados > mitad, escalados - modulo, escalados)
+            grandes = np.nonzero(np.abs(escalados) > limite)[0]
+            if grandes.size == 0:
+                break
+            fraccion = _reconstruccion_racional(int(escalados[grandes[0]]) % modulo, modulo)
+            if fraccion is None or fraccion[1] == 1:
+                return None
+            denominador *= fraccion[1]
+            if denominador > limite:
+                return None
+
+        vector = [0] * num_columnas
+        vector[libre] = denominador
+        for pivote, valor in zip(pivotes, escalados):
+            # En la forma escalonada reducida un pivote solo depende de las libres posteriores
+            if valor and pivote > libre:
+                return None
+            vector[pivote] = int(valor)
+        divisor = 0
+        for x in vector:
+            divisor = gcd(divisor, x)
+        base.append([x // divisor for x in vector] if divisor > 1 else vector)
+    return base
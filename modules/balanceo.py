@@ -1,7 +1,48 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from itertools import count, islice
+from types import MappingProxyType
 import numpy as np
-import pandas as pd
 from fractions import Fraction
-from modules.utils import minimizar_coeficientes
+from math import gcd
+from modules.algebra_entera import FormaEscalonadaIncremental, base_espacio_nulo, es_solucion, vector_primitivo
+from modules.algebra_flotante import espacio_nulo_flotante
+from modules.algebra_modular import espacio_nulo_modular, rango_modular
+from modules import instrumentacion
+from modules.cache_balanceo import CacheBalanceo
+from modules.programacion_lineal import minimizar_lineal
+from modules.parser import EspecieQuimica, obtener_tabla_simbolos, parsear_ecuacion_completa
+from modules.utils import NORMAL_TO_SUB, entero_positivo, minimizar_coeficientes
+
+# Motores de espacio nulo: reciben (filas, num_columnas) y devuelven (base, columnas_libres)
+# con la base ya verificada, o None si no pudieron certificarla (se recurre al motor entero)
+MOTORES = {
+    'entero': base_espacio_nulo,
+    'modular': espacio_nulo_modular,
+    'flotante': espacio_nulo_flotante,
+}
+
+# Motivos por los que el triaje descarta una ecuación sin llegar al solver
+MOTIVO_LADO_VACIO = 'lado_vacio'
+MOTIVO_ESPECIE_VACIA = 'especie_vacia'
+MOTIVO_ELEMENTO_UN_LADO = 'elemento_en_un_solo_lado'
+MOTIVO_RANGO_COMPLETO = 'rango_completo'
+
+# Pseudo-elemento con el que la carga de las especies entra como una fila más de A
+ELEMENTO_CARGA = 'carga'
+
+# Desde este rango (estimado como min(filas, columnas)) el motor modular supera al entero;
+# calibrado con benchmarks/motores_espacio_nulo.py
+RANGO_MOTOR_MODULAR = 24
+
 
 class BalanceadorEcuacion:
     """
@@ -11,18 +52,41 @@ class BalanceadorEcuacion:
         """
         Inicializa con listas de diccionarios de elementos y sus conteos.
         Ejemplo: [{'H': 2, 'O': 1}, {'O': 2}]
+        La carga de un ion va como el pseudo-elemento ELEMENTO_CARGA (ver conteo_con_carga).
         """
         self.reactivos = reactivos
         self.productos = productos
         self.todos_los_compuestos = self.reactivos + self.productos
-        self.elementos_unicos = self._obtener_elementos_unicos()
-        
-    def _obtener_elementos_unicos(self):
-        """Obtiene la lista de todos los elementos únicos presentes en la ecuación."""
-        elementos = set()
-        for compuesto in self.todos_los_compuestos:
-            elementos.update(compuesto.keys())
-        return sorted(list(elementos))
+        self.busqueda_agotada = False
+        self.motor_usado = None
+        self.dimension_nulo = None
+        self.bloques_sin_solucion = []
+        self.motivo_sin_solucion = None
+        self._factorizacion = None
+        self._preparar_conteos()
+
+    def _preparar_conteos(self):
+        """
+        Pasa los conteos de todas las especies a formato compacto (una sola vez):
+        arreglos paralelos de fila (elemento), columna (especie) y valor, con el signo
+        de los productos ya aplicado. También obtiene la lista ordenada de elementos únicos.
+        """
+        self._cache_formulas = None
+        self._cache_variables = []
+        simbolos, columnas, valores = [], [], []
+        for j, compuesto in enumerate(self.todos_los_compuestos):
+            simbolos.extend(compuesto.keys())
+            valores.extend(compuesto.values())
+            columnas.extend([j] * len(compuesto))
+
+        # np.unique ordena y numera los elementos en un solo paso
+        elementos, filas = np.unique(np.array(simbolos, dtype=str), return_inverse=True)
+        self._filas = filas.astype(np.intp)
+        self._columnas = np.array(columnas, dtype=np.intp)
+        self._valores = np.array(valores, dtype=np.int64)
+        # Reactivos son positivos, Productos son negativos
+        self._valores[self._columnas >= len(self.reactivos)] *= -1
+        self.elementos_unicos = elementos.tolist()
 
     def construir_matriz(self):
         """
@@ -32,162 +96,1112 @@ class BalanceadorEcuacion:
         - Columnas: Compuestos (reactivos y productos)
         - Valores: Conteos del elemento en el compuesto.
                    (Positivo para reactivos, Negativo para productos)
+        Se llena en un solo paso vectorizado a partir de los conteos compactos.
         """
-        num_compuestos = len(self.todos_los_compuestos)
-        num_elementos = len(self.elementos_unicos)
-        
-        # Inicializar la matriz con ceros
-        matriz = np.zeros((num_elementos, num_compuestos), dtype=int)
-        
-        for i, elemento in enumerate(self.elementos_unicos):
-            for j, compuesto in enumerate(self.todos_los_compuestos):
-                conteo = compuesto.get(elemento, 0)
-                
-                # Reactivos son positivos, Productos son negativos
-                if j < len(self.reactivos):
-                    matriz[i, j] = conteo
-                else:
-                    matriz[i, j] = -conteo
-                    
+        forma = (len(self.elementos_unicos), len(self.todos_los_compuestos))
+        matriz = np.zeros(forma, dtype=np.int64)
+        # Cada par (elemento, especie) aparece una sola vez, así que basta una asignación
+        matriz[self._filas, self._columnas] = self._valores
         return matriz, self.elementos_unicos
-    
-    def resolver(self):
+
+    def construir_matriz_dispersa(self, formato='coo'):
+        """
+        Devuelve la matriz A en formato disperso, útil para sistemas muy anchos:
+        - 'coo': ((filas, columnas, valores), forma)
+        - 'csr': ((indptr, columnas, valores), forma), con las entradas ordenadas por fila.
+        Junto con la lista de elementos únicos, igual que construir_matriz.
         """
-        Resuelve el sistema de ecuaciones lineales homogéneo Ax = 0.
-        Utiliza álgebra lineal para encontrar el espacio nulo de la matriz A.
+        forma = (len(self.elementos_unicos), len(self.todos_los_compuestos))
+        if formato == 'coo':
+            return ((self._filas, self._columnas, self._valores), forma), self.elementos_unicos
+        if formato == 'csr':
+            orden = np.lexsort((self._columnas, self._filas))
+            indptr = np.zeros(forma[0] + 1, dtype=np.intp)
+            np.cumsum(np.bincount(self._filas, minlength=forma[0]), out=indptr[1:])
+            return ((indptr, self._columnas[orden], self._valores[orden]), forma), self.elementos_unicos
+        raise ValueError(f"Formato disperso desconocido: {formato}")
+
+    def agregar_especie(self, compuesto, producto=False):
+        """
+        Agrega una especie (diccionario de conteos) al final de los reactivos o de los
+        productos y actualiza la factorización (forma escalonada y pivotes) en lugar de
+        recalcularla. Los elementos nuevos se agregan como filas. Devuelve el índice
+        de la especie dentro de todos_los_compuestos.
+        """
+        self._asegurar_factorizacion()
+        if producto:
+            indice = len(self.todos_los_compuestos)
+            self.productos = self.productos + [compuesto]
+        else:
+            indice = len(self.reactivos)
+            self.reactivos = self.reactivos + [compuesto]
+        self.todos_los_compuestos = self.reactivos + self.productos
+
+        for elemento in compuesto:
+            if elemento not in self._restricciones:
+                # Elemento nuevo: fila de ceros para las especies que ya estaban
+                self._factorizacion.agregar_fila([0] * self._factorizacion.num_columnas)
+                self._restricciones.append(elemento)
+
+        signo = -1 if producto else 1
+        columna = [signo * compuesto.get(elemento, 0) for elemento in self._restricciones]
+        self._factorizacion.agregar_columna(indice, columna)
+        self._preparar_conteos()
+        return indice
+
+    def quitar_especie(self, indice):
+        """
+        Quita la especie de la posición indicada (en todos_los_compuestos) y actualiza
+        la factorización; los elementos que dejan de aparecer se quitan como filas.
+        """
+        self._asegurar_factorizacion()
+        if indice < len(self.reactivos):
+            self.reactivos = self.reactivos[:indice] + self.reactivos[indice + 1:]
+        else:
+            j = indice - len(self.reactivos)
+            self.productos = self.productos[:j] + self.productos[j + 1:]
+        self.todos_los_compuestos = self.reactivos + self.productos
+        self._factorizacion.quitar_columna(indice)
+
+        presentes = set()
+        for compuesto in self.todos_los_compuestos:
+            presentes.update(compuesto.keys())
+        for k in reversed(range(len(self._restricciones))):
+            if self._restricciones[k] not in presentes:
+                self._factorizacion.quitar_fila(k)
+                del self._restricciones[k]
+        self._preparar_conteos()
+
+    def _asegurar_factorizacion(self):
+        """Construye la factorización incremental la primera vez que se edita la ecuación."""
+        if self._factorizacion is None:
+            matriz, elementos = self.construir_matriz()
+            self._factorizacion = FormaEscalonadaIncremental.desde_filas(
+                matriz.tolist(), len(self.todos_los_compuestos))
+            self._restricciones = list(elementos)
+
+    def espacio_nulo(self, motor='auto'):
         """
+        Devuelve una base entera del espacio nulo de la matriz A (Ax = 0):
+        una lista de vectores de enteros primitivos (sin divisor común), uno por variable libre.
+        """
+        base, _ = self._base_espacio_nulo(motor)
+        return base
+
+    def _base_espacio_nulo(self, motor):
+        """
+        Calcula (base, columnas_libres) con el motor pedido (ver MOTORES):
+        - 'entero': eliminación sin fracciones con enteros de Python.
+        - 'modular': eliminación módulo un primo con NumPy y levantamiento p-ádico (Dixon).
+        - 'flotante': lstsq de NumPy con reconstrucción de los enteros.
+        - 'auto': elige según el tamaño de la matriz y sus entradas (ver elegir_motor).
+        Los motores distintos del entero verifican exactamente A·x = 0 (y la dimensión
+        del espacio nulo) antes de devolver; si no logran certificar, se recurre al
+        motor entero. self.motor_usado registra el motor que dio el resultado.
+        Si la ecuación se editó con agregar_especie/quitar_especie, los motores
+        'entero' y 'auto' usan la factorización mantenida de forma incremental.
+        """
+        if motor != 'auto' and motor not in MOTORES:
+            raise ValueError(f"Motor de resolución desconocido: {motor}")
+        if motor in ('entero', 'auto') and self._factorizacion is not None:
+            self.motor_usado = 'entero'
+            base, libres = self._factorizacion.base_espacio_nulo()
+            self.dimension_nulo = len(base)
+            return base, libres
+
         matriz, _ = self.construir_matriz()
-        
-        # Si la matriz es vacía o tiene un tamaño no estándar, retornar vacío.
-        if matriz.size == 0:
-            return []
+        base, libres, self.motor_usado = calcular_espacio_nulo(matriz, motor)
+        self.dimension_nulo = len(base)
+        return base, libres
 
-        # Usar SVD (Descomposición en Valores Singulares) para encontrar el espacio nulo.
-        # Esto es más robusto que np.linalg.solve o np.linalg.null_space (que no siempre está disponible)
-        
-        # 1. Descomposición SVD
-        # U * S * Vh = A
-        try:
-            U, S, Vh = np.linalg.svd(matriz)
-        except np.linalg.LinAlgError:
-            print("Error: No se pudo realizar SVD en la matriz.")
-            return []
-            
-        # 2. El espacio nulo se basa en las columnas de Vh (o filas de V)
-        # correspondientes a valores singulares muy cercanos a cero (criterio de tolerancia).
-        # np.linalg.null_space(A) es la forma más directa, pero simulamos la lógica:
-        
-        # Crear una matriz para el sistema expandido (con la última columna como identidad)
-        # Se requiere al menos una variable libre, por lo que el número de columnas debe ser > número de filas
-        if matriz.shape[1] <= matriz.shape[0]:
-            # El sistema no es sub-determinado (no hay variables libres si es invertible/cuadrada)
-            # Solo balancea si es homogéneo y tiene una solución no trivial (e.g., más variables que ecuaciones)
-            return [] # Caso no trivial no resuelto por este método simple si es cuadrada.
-
-        # Intentar con el método más simple de np.linalg.null_space si está disponible y es robusto.
-        # Fallback a la versión que usa Fracciones (la más precisa para este problema)
-        
-        # Reducción de filas para obtener un vector base de enteros (Gauss-Jordan)
-        try:
-            # Convertir a Fracciones para mantener la precisión
-            matriz_frac = pd.DataFrame(matriz).applymap(Fraction).values
-        except Exception:
-             # Si no hay pandas o Fraction, usar np.array de enteros y tolerar la imprecisión
-             matriz_frac = matriz.astype(float)
-        
-        # Implementación simple de Gauss-Jordan para encontrar el espacio nulo
-        # Aumentar la matriz A con una columna de ceros (B=0)
-        num_filas, num_cols = matriz.shape
-        if num_filas >= num_cols: # Sobredeterminado o cuadrado (trivial x=0 o no solucionable con este método)
+    def descomponer_bloques(self):
+        """
+        Separa la matriz A en subsistemas independientes: las componentes conexas del
+        grafo bipartito elemento-especie (cada especie se une a los elementos que contiene).
+        Devuelve una lista de (especies, elementos), con índices de columna y de fila
+        ordenados, en el orden de la primera especie de cada bloque.
+        """
+        num_especies = len(self.todos_los_compuestos)
+        padre = list(range(num_especies + len(self.elementos_unicos)))
+
+        def raiz(x):
+            while padre[x] != x:
+                padre[x] = padre[padre[x]]
+                x = padre[x]
+            return x
+
+        for fila, columna in zip(self._filas.tolist(), self._columnas.tolist()):
+            a, b = raiz(columna), raiz(num_especies + fila)
+            if a != b:
+                padre[b] = a
+
+        bloques = {}
+        for j in range(num_especies):
+            bloques.setdefault(raiz(j), ([], []))[0].append(j)
+        for i in range(len(self.elementos_unicos)):
+            bloques[raiz(num_especies + i)][1].append(i)
+        return list(bloques.values())
+
+    def triaje(self):
+        """
+        Controles estructurales baratos que detectan ecuaciones imposibles de balancear
+        antes de hacer álgebra lineal. Devuelve None si la ecuación los pasa, o un
+        diccionario con 'motivo' (una de las constantes MOTIVO_*), 'mensaje', y las
+        'especies' (índices) y 'elementos' involucrados:
+        - lado_vacio: no hay reactivos o no hay productos.
+        - especie_vacia: una especie sin elementos (columna nula de A).
+        - elemento_en_un_solo_lado: un elemento solo aparece en reactivos o solo en productos.
+        - rango_completo: el rango de A es igual a la cantidad de especies, así que
+          solo existe la solución x = 0 (se comprueba solo si hay tantos elementos como
+          especies, con el rango módulo un primo, que nunca supera al exacto).
+        """
+        num_especies = len(self.todos_los_compuestos)
+        if not self.reactivos or not self.productos:
+            return _motivo(MOTIVO_LADO_VACIO, "La ecuación necesita al menos un reactivo y un producto.")
+
+        vacias = np.flatnonzero(np.bincount(self._columnas, minlength=num_especies) == 0).tolist()
+        if vacias:
+            return _motivo(MOTIVO_ESPECIE_VACIA, "Hay especies sin elementos.", especies=vacias)
+
+        num_elementos = len(self.elementos_unicos)
+        positivos = np.bincount(self._filas[self._valores > 0], minlength=num_elementos)
+        negativos = np.bincount(self._filas[self._valores < 0], minlength=num_elementos)
+        un_lado = np.flatnonzero((positivos == 0) | (negativos == 0)).tolist()
+        if un_lado:
+            elementos = [self.elementos_unicos[i] for i in un_lado]
+            return _motivo(MOTIVO_ELEMENTO_UN_LADO,
+                           f"Elementos que aparecen de un solo lado: {', '.join(elementos)}.",
+                           elementos=elementos)
+
+        if num_elementos >= num_especies and np.abs(self._valores).max() < 2 ** 31:
+            matriz, _ = self.construir_matriz()
+            if rango_modular(matriz.tolist()) == num_especies:
+                return _motivo(MOTIVO_RANGO_COMPLETO,
+                               "Las ecuaciones por elemento solo admiten la solución nula.")
+        return None
+
+    def resolver(self, modo='exacto', max_nodos=200000, tiempo_max=2.0, motor='auto', procesos=1,
+                 triar=True):
+        """
+        Resuelve el sistema de ecuaciones lineales homogéneo Ax = 0 de forma exacta.
+        Usa eliminación gaussiana sin fracciones sobre enteros de Python, por lo que
+        no hay redondeos aunque los coeficientes sean grandes.
+        Devuelve la lista de coeficientes enteros positivos, o [] si no hay solución.
+
+        Modos:
+        - 'exacto': con varias variables libres las fija todas en 1; si así algún
+          coeficiente no queda positivo, se usa la solución de partida de la búsqueda
+          del modo 'minimo' (positiva, pero sin probar que sea la mínima).
+        - 'minimo': busca la solución positiva de menor suma de coeficientes
+          (ver buscar_solucion_minima); max_nodos y tiempo_max acotan la búsqueda
+          y self.busqueda_agotada indica si el presupuesto se terminó.
+
+        motor elige cómo se calcula el espacio nulo ('auto', 'entero', 'modular',
+        'flotante' o uno registrado con registrar_motor; ver _base_espacio_nulo).
+
+        Antes de resolver se aplica el triaje (ver triaje): si la ecuación no lo pasa se
+        devuelve [] sin llegar al solver y el motivo queda en self.motivo_sin_solucion.
+        triar=False lo omite (cuando quien llama ya lo hizo).
+
+        Si la matriz se separa en bloques independientes (ver descomponer_bloques),
+        cada bloque se resuelve por separado, en paralelo si procesos > 1, y los
+        coeficientes se vuelven a unir; max_nodos y tiempo_max se aplican a cada bloque.
+        self.bloques_sin_solucion lista las especies de los bloques que no se pudieron
+        balancear (en ese caso se devuelve []).
+        """
+        if modo not in ('exacto', 'minimo'):
+            raise ValueError(f"Modo de resolución desconocido: {modo}")
+        self.busqueda_agotada = False
+        self.dimension_nulo = None
+        self.bloques_sin_solucion = []
+        self.motivo_sin_solucion = None
+        if not self.todos_los_compuestos:
             return []
-            
-        # Matriz aumentada A|I, para encontrar el espacio nulo con una variable libre
-        # Matriz RREF (Row Reduced Echelon Form)
-        
-        # Para simplificar y obtener un resultado que Tkinter pueda mostrar, 
-        # confiamos en la lógica de Álgebra Lineal que asume que la última variable es 1 (o libre).
-        
-        # Matriz de coeficientes A (sin la última columna de variables)
-        A = matriz[:, :-1]
-        # Vector b (negativo de la última columna de A)
-        b = -matriz[:, -1]
-        
-        try:
-            # Resolver A x = b para las variables x_1 a x_{n-1}
-            # Se usa np.linalg.lstsq para sistemas que pueden ser no invertibles
-            solucion_parcial, residuos, rango, singulares = np.linalg.lstsq(A, b, rcond=None)
-            
-            # La última variable (x_n) se fija a 1 (o la primera variable libre)
-            coeficientes = np.append(solucion_parcial, 1.0)
-            
-            # Convertir a Fracciones
-            coeficientes_fracciones = [Fraction(round(c, 8)) for c in coeficientes]
-            
-            # Intentar limpiar denominadores si son muy grandes por error de float
-            return coeficientes_fracciones
-            
-        except np.linalg.LinAlgError:
-            print("Error: El sistema es singular (linealmente dependiente o inconsistente) o la implementación de lstsq falló.")
+        self.motivo_sin_solucion = self.triaje() if triar else None
+        if self.motivo_sin_solucion is not None:
             return []
-        except ValueError:
-            # Si el sistema no se puede resolver (e.g., A no tiene el tamaño correcto)
+
+        # Con una factorización incremental activa se resuelve todo junto para aprovecharla
+        if self._factorizacion is None:
+            bloques = self.descomponer_bloques()
+            if len(bloques) > 1:
+                return self._resolver_por_bloques(bloques, modo, max_nodos, tiempo_max, motor, procesos)
+
+        if modo == 'minimo':
+            coeficientes, self.busqueda_agotada = self.buscar_solucion_minima(max_nodos, tiempo_max, motor)
+            return coeficientes
+
+        base = self.espacio_nulo(motor)
+        if not base:
+            # Solo existe la solución trivial x = 0: la ecuación no se puede balancear
             return []
-            
+
+        # Con una sola variable libre la solución es única salvo escala.
+        # Con varias, se fijan todas las variables libres en 1 (la suma de la base).
+        coeficientes = [sum(componentes) for componentes in zip(*base)]
+        coeficientes = vector_primitivo(coeficientes)
+        if all(c < 0 for c in coeficientes):
+            coeficientes = [-c for c in coeficientes]
+        if not all(c > 0 for c in coeficientes):
+            # Alguna especie quedaría con coeficiente nulo o del lado contrario, lo que no
+            # prueba que no haya solución: basta la solución de partida de la búsqueda
+            # (sin nodos), que es positiva aunque no se pruebe mínima
+            coeficientes, _ = self.buscar_solucion_minima(0, tiempo_max, motor)
+        return coeficientes
+
+    def _resolver_por_bloques(self, bloques, modo, max_nodos, tiempo_max, motor, procesos):
+        """Resuelve cada bloque con su propio balanceador y une los coeficientes."""
+        num_reactivos = len(self.reactivos)
+        tareas = []
+        for especies, _ in bloques:
+            # Los conteos pueden ser vistas de solo lectura (no serializables): se copian a dict
+            reactivos = [dict(self.todos_los_compuestos[j]) for j in especies if j < num_reactivos]
+            productos = [dict(self.todos_los_compuestos[j]) for j in especies if j >= num_reactivos]
+            tareas.append((reactivos, productos, modo, max_nodos, tiempo_max, motor))
+
+        if procesos > 1:
+            with ProcessPoolExecutor(max_workers=min(procesos, len(tareas))) as ejecutor:
+                resultados = list(ejecutor.map(_resolver_bloque, tareas))
+        else:
+            resultados = [_resolver_bloque(tarea) for tarea in tareas]
+
+        coeficientes = [0] * len(self.todos_los_compuestos)
+        motores = set()
+        self.dimension_nulo = 0
+        for (especies, _), (coeficientes_bloque, agotada, motor_usado, dimension) in zip(bloques, resultados):
+            self.busqueda_agotada = self.busqueda_agotada or agotada
+            self.dimension_nulo += dimension or 0
+            motores.add(motor_usado)
+            if not coeficientes_bloque:
+                self.bloques_sin_solucion.append(especies)
+                continue
+            for j, c in zip(especies, coeficientes_bloque):
+                coeficientes[j] = c
+        self.motor_usado = ",".join(sorted(m for m in motores if m))
+        return [] if self.bloques_sin_solucion else coeficientes
+
+    def buscar_solucion_minima(self, max_nodos=200000, tiempo_max=2.0, motor='auto'):
+        """
+        Busca la solución con todos los coeficientes enteros positivos y la menor suma,
+        útil cuando la ecuación admite varios balanceos independientes.
+        Devuelve (coeficientes, agotado); ver solucion_minima_positiva.
+        """
+        base, libres = self._base_espacio_nulo(motor)
+        if len(base) == 1:
+            # Solución única salvo escala: basta con orientar el vector primitivo
+            vector = base[0] if base[0][libres[0]] > 0 else [-c for c in base[0]]
+            return (vector if all(c > 0 for c in vector) else []), False
+        # La solución con todas las variables libres en 1 sirve de cota inicial, y de
+        # respuesta si el presupuesto se agota en ecuaciones con muchas especies
+        inicial = vector_primitivo([sum(componentes) for componentes in zip(*base)]) if base else []
+        if not all(c > 0 for c in inicial):
+            inicial = None
+        return solucion_minima_positiva(base, libres, max_nodos, tiempo_max, inicial)
+
+    def balancear(self, modo='minimo', max_nodos=200000, tiempo_max=2.0, motor='auto', procesos=1):
+        """
+        Resuelve como resolver (por defecto en modo 'minimo') y devuelve un
+        ResultadoBalanceo: coeficientes enteros, estado y tiempos, con los textos
+        armados solo cuando se piden. Con la instrumentación activa (ver
+        modules.instrumentacion) el resultado guarda además los registros por etapa.
+        """
+        registros = None
+        inicio = time.perf_counter()
+        if instrumentacion.esta_activa():
+            with instrumentacion.recolectar() as registros:
+                coeficientes = self.resolver(modo, max_nodos, tiempo_max, motor, procesos)
+        else:
+            coeficientes = self.resolver(modo, max_nodos, tiempo_max, motor, procesos)
+        tiempos = {'resolucion': time.perf_counter() - inicio}
+        if coeficientes:
+            estado = 'ok'
+        else:
+            estado = 'presupuesto_agotado' if self.busqueda_agotada else 'sin_solucion'
+        return ResultadoBalanceo(coeficientes, self, estado, self.motivo_sin_solucion, tiempos, registros,
+                                 self.busqueda_agotada, self.bloques_sin_solucion)
+
+    def ajustar_mediciones(self, mediciones, incertidumbres=None, unidades='moles', max_denominador=12,
+                           motor='auto'):
+        """
+        Ajusta los coeficientes a datos experimentales por mínimos cuadrados ponderados,
+        con la restricción de que el resultado esté en el espacio nulo exacto de A
+        (x = B·t, con B la base entera): se minimiza la suma de ((y - x) / sigma)^2.
+
+        - mediciones: arreglo experimentos x especies (o un solo vector) con las
+          cantidades consumidas de cada reactivo y formadas de cada producto, positivas.
+        - incertidumbres: desvíos sigma con la misma forma, un escalar o None (todos 1).
+        - unidades: 'moles' o 'masas' (en gramos; se pasan a moles con las masas molares,
+          igual que las incertidumbres).
+        - max_denominador: denominador máximo al llevar el ajuste a una razón entera.
+
+        Todos los experimentos se resuelven a la vez (ecuaciones normales apiladas).
+        Devuelve un diccionario con una fila por experimento:
+        'coeficientes' (razón entera ajustada, lista de listas), 'ajuste' (cantidades
+        ajustadas en moles, cumplen A·x = 0), 'residuos' ((y - x) / sigma) y 'chi2'.
+        """
+        if unidades not in ('moles', 'masas'):
+            raise ValueError(f"Unidades desconocidas: {unidades}")
+        num_especies = len(self.todos_los_compuestos)
+        medidas = np.atleast_2d(np.asarray(mediciones, dtype=float))
+        if medidas.shape[1] != num_especies:
+            raise ValueError(f"Se esperaban {num_especies} mediciones por experimento, "
+                             f"se recibieron {medidas.shape[1]}")
+        sigmas = np.broadcast_to(np.asarray(1.0 if incertidumbres is None else incertidumbres, dtype=float),
+                                 medidas.shape)
+        if np.any(sigmas <= 0):
+            raise ValueError("Las incertidumbres deben ser positivas")
+        if unidades == 'masas':
+            masas = self.masas_molares()
+            if np.any(masas <= 0):
+                raise ValueError("Hay especies sin masa molar (por ejemplo, electrones)")
+            medidas, sigmas = medidas / masas, sigmas / masas
+
+        base, libres = self._base_espacio_nulo(motor)
+        if not base:
+            raise ValueError("La ecuación solo admite la solución nula: no hay coeficientes que ajustar")
+        matriz_base = np.array(base, dtype=float).T    # especies x variables libres
+        pesos = 1.0 / sigmas ** 2
+
+        # Ecuaciones normales de cada experimento: (B^T W B) t = B^T W y
+        normales = np.einsum('jk,ej,jl->ekl', matriz_base, pesos, matriz_base)
+        independientes = np.einsum('jk,ej,ej->ek', matriz_base, pesos, medidas)
+        extensiones = np.linalg.solve(normales, independientes[..., None])[..., 0]
+        ajuste = extensiones @ matriz_base.T
+        residuos = (medidas - ajuste) / sigmas
+
+        coeficientes = [_razon_entera(fila[libres], base, libres, max_denominador) for fila in ajuste]
+        return {'coeficientes': coeficientes, 'ajuste': ajuste, 'residuos': residuos,
+                'chi2': (residuos ** 2).sum(axis=1)}
+
+    def masas_molares(self):
+        """Masa molar (g/mol) de cada especie, en el orden de todos_los_compuestos."""
+        tabla = obtener_tabla_simbolos()
+        return np.array([sum(cantidad * tabla.masas[tabla.id_de(elemento)] for elemento, cantidad in compuesto.items()
+                             if elemento != ELEMENTO_CARGA)
+                         for compuesto in self.todos_los_compuestos], dtype=float)
 
     def minimizar_coeficientes(self, coeficientes):
         """Llama a la función de utilidad para minimizar los coeficientes."""
         return minimizar_coeficientes(coeficientes)
 
     def obtener_ecuacion_con_variables(self):
-        """Formatea la ecuación con variables (a, b, c, ...) para el output."""
-        variables = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o', 'p'][:len(self.todos_los_compuestos)]
-        
-        compuestos_str = []
-        for i, compuesto in enumerate(self.todos_los_compuestos):
-            # Formatear el compuesto (ej: H2O)
-            molecula_str = "".join([f"{elem}{count}" if count > 1 else elem for elem, count in compuesto.items()])
-            compuestos_str.append(f"{variables[i]}{molecula_str}")
-            
-        # Dividir reactivos y productos
-        num_reactivos = len(self.reactivos)
-        reactivos_str = " + ".join(compuestos_str[:num_reactivos])
-        productos_str = " + ".join(compuestos_str[num_reactivos:])
-        
-        return f"{reactivos_str} → {productos_str}"
+        """Formatea la ecuación con variables (a, b, c, ..., z, aa, ab, ...) para el output."""
+        variables = self._variables()
+        formulas = self._formulas()
+        return self._unir_lados([f"{variable}{formula}" for variable, formula in zip(variables, formulas)])
 
     def obtener_ecuacion_texto(self, elemento, fila_matriz):
-        """Formatea una fila de la matriz como una ecuación de balanceo (ej: 2a + 0b - 1c = 0)."""
-        ecuacion = []
-        variables = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o', 'p'][:len(self.todos_los_compuestos)]
-
-        for i, conteo in enumerate(fila_matriz):
-            if conteo != 0:
-                signo = '+' if conteo > 0 and i > 0 else ''
+        """Formatea una fila de la matriz como una ecuación de balanceo (ej: 2a - c = 0)."""
+        variables = self._variables()
+        terminos = []
+        for variable, conteo in zip(variables, fila_matriz):
+            if conteo:
                 coef = abs(conteo) if abs(conteo) > 1 else ''
-                ecuacion.append(f"{signo} {coef}{variables[i]}")
-        
-        return "".join(ecuacion).strip().strip('+').strip() + " = 0"
-        
+                if not terminos:
+                    terminos.append(f"{'-' if conteo < 0 else ''}{coef}{variable}")
+                else:
+                    terminos.append(f"{'-' if conteo < 0 else '+'} {coef}{variable}")
+        return " ".join(terminos) + " = 0"
+
     def formatear_ecuacion_balanceada(self, coeficientes):
         """Formatea la ecuación final con coeficientes enteros."""
         if len(coeficientes) != len(self.todos_los_compuestos):
             return "Error: Número de coeficientes no coincide con el número de compuestos."
-            
-        compuestos_str = []
-        for i, compuesto in enumerate(self.todos_los_compuestos):
-            coeficiente = coeficientes[i]
-            
-            # Formatear el compuesto (ej: H2O)
-            molecula_str = "".join([f"{elem}{count}" if count > 1 else elem for elem, count in compuesto.items()])
-            
-            # Si el coeficiente es 1, no se muestra
-            coef_str = str(coeficiente) if coeficiente > 1 else ""
-            
-            compuestos_str.append(f"{coef_str}{molecula_str}")
-            
-        # Dividir reactivos y productos
+
+        # Si el coeficiente es 1, no se muestra
+        return self._unir_lados([f"{coeficiente}{formula}" if coeficiente > 1 else formula
+                                 for coeficiente, formula in zip(coeficientes, self._formulas())])
+
+    def _variables(self):
+        """Nombres de variable de cada especie, generados una sola vez por tamaño de ecuación."""
+        n = len(self.todos_los_compuestos)
+        if len(self._cache_variables) != n:
+            self._cache_variables = [nombre_variable(i) for i in range(n)]
+        return self._cache_variables
+
+    def _formulas(self):
+        """Texto de la fórmula de cada especie (ej: H2O), armado una sola vez."""
+        if self._cache_formulas is None:
+            self._cache_formulas = [formula_de_conteo(compuesto) for compuesto in self.todos_los_compuestos]
+        return self._cache_formulas
+
+    def _unir_lados(self, textos):
+        """Une los textos de cada especie en 'reactivos → productos'."""
         num_reactivos = len(self.reactivos)
-        reactivos_str = " + ".join(compuestos_str[:num_reactivos])
-        productos_str = " + ".join(compuestos_str[num_reactivos:])
-        
-        return f"{reactivos_str} → {productos_str}"
\ No newline at end of file
+        return f"{' + '.join(textos[:num_reactivos])} → {' + '.join(textos[num_reactivos:])}"
+
+
+class ResultadoBalanceo:
+    """
+    Resultado compacto de un balanceo: coeficientes enteros (tupla), referencias a las
+    listas de especies, estado ('ok', 'sin_solucion' o 'presupuesto_agotado'), motivo
+    del triaje (o None), tiempos en segundos por etapa y, si la instrumentación estaba
+    activa, los registros por etapa (lista; None si no), incluidos los del formateo.
+    busqueda_agotada indica que el presupuesto de la búsqueda se terminó: con estado
+    'ok' los coeficientes balancean la ecuación pero no está probado que sean mínimos.
+    bloques_sin_solucion lista las especies de los bloques independientes que no se
+    pudieron balancear (ver BalanceadorEcuacion.resolver).
+
+    Los textos (ecuación balanceada, con subíndices, con variables y las ecuaciones por
+    elemento) se arman la primera vez que se piden y quedan guardados, así que quien
+    solo necesita los enteros no paga por formatear. Si el balanceador se edita después
+    (agregar_especie/quitar_especie), el resultado sigue describiendo la ecuación original.
+    """
+    __slots__ = ('coeficientes', 'reactivos', 'productos', 'estado', 'motivo', 'tiempos', 'registros',
+                 'busqueda_agotada', 'bloques_sin_solucion', '_balanceador', '_ecuacion', '_ecuacion_subindices', '_ecuacion_con_variables', '_pasos')
+
+    def __init__(self, coeficientes, balanceador, estado='ok', motivo=None, tiempos=None, registros=None,
+                 busqueda_agotada=False, bloques_sin_solucion=()):
+        self.coeficientes = tuple(coeficientes)
+        self.reactivos = balanceador.reactivos
+        self.productos = balanceador.productos
+        self.estado = estado
+        self.motivo = motivo
+        self.tiempos = tiempos if tiempos is not None else {}
+        self.registros = registros
+        self.busqueda_agotada = busqueda_agotada
+        self.bloques_sin_solucion = [list(especies) for especies in bloques_sin_solucion]
+        self._balanceador = balanceador
+        self._ecuacion = None
+        self._ecuacion_subindices = None
+        self._ecuacion_con_variables = None
+        self._pasos = None
+
+    def __bool__(self):
+        return self.estado == 'ok'
+
+    def __repr__(self):
+        return f"ResultadoBalanceo(estado={self.estado!r}, coeficientes={list(self.coeficientes)!r})"
+
+    @property
+    def ecuacion(self):
+        """Ecuación balanceada (ej: '2H2 + O2 → 2H2O'), o None si no hay solución."""
+        if self._ecuacion is None and self:
+            self._ecuacion = self._formatear(lambda: self.balanceador.formatear_ecuacion_balanceada(self.coeficientes))
+        return self._ecuacion
+
+    @property
+    def ecuacion_subindices(self):
+        """Ecuación balanceada con los subíndices en unicode (ej: '2H₂ + O₂ → 2H₂O')."""
+        if self._ecuacion_subindices is None and self:
+            formulas = [con_subindices(formula) for formula in self.balanceador._formulas()]
+            self._ecuacion_subindices = self.balanceador._unir_lados(
+                [f"{coeficiente}{formula}" if coeficiente > 1 else formula
+                 for coeficiente, formula in zip(self.coeficientes, formulas)])
+        return self._ecuacion_subindices
+
+    @property
+    def ecuacion_con_variables(self):
+        """Ecuación con una variable por especie (ver obtener_ecuacion_con_variables)."""
+        if self._ecuacion_con_variables is None:
+            self._ecuacion_con_variables = self._formatear(self.balanceador.obtener_ecuacion_con_variables)
+        return self._ecuacion_con_variables
+
+    @property
+    def pasos(self):
+        """Tupla de (elemento, ecuación) con el balance de cada elemento (ej: ('H', '2a - 2c = 0'))."""
+        if self._pasos is None:
+            def pasos():
+                matriz, elementos = self.balanceador.construir_matriz()
+                return tuple((elemento, self.balanceador.obtener_ecuacion_texto(elemento, fila))
+                             for elemento, fila in zip(elementos, matriz))
+            self._pasos = self._formatear(pasos)
+        return self._pasos
+
+    def _formatear(self, funcion):
+        """Ejecuta un formateo; con registros, las etapas que mida se agregan al resultado."""
+        if self.registros is None:
+            return funcion()
+        with instrumentacion.recolectar(self.registros):
+            return funcion()
+
+    @property
+    def balanceador(self):
+        """Balanceador de la ecuación original (se reconstruye si el original se editó)."""
+        if (self._balanceador.reactivos is not self.reactivos
+                or self._balanceador.productos is not self.productos):
+            self._balanceador = BalanceadorEcuacion(self.reactivos, self.productos)
+        return self._balanceador
+
+
+def _motivo(motivo, mensaje, especies=(), elementos=()):
+    """Arma el diccionario que devuelve BalanceadorEcuacion.triaje."""
+    return {'motivo': motivo, 'mensaje': mensaje, 'especies': list(especies), 'elementos': list(elementos)}
+
+
+def _resolver_bloque(tarea):
+    """Resuelve un bloque independiente; puede ejecutarse dentro de un proceso del pool."""
+    reactivos, productos, modo, max_nodos, tiempo_max, motor = tarea
+    balanceador = BalanceadorEcuacion(reactivos, productos)
+    coeficientes = balanceador.resolver(modo, max_nodos, tiempo_max, motor)
+    return coeficientes, balanceador.busqueda_agotada, balanceador.motor_usado, balanceador.dimension_nulo
+
+
+def calcular_espacio_nulo(matriz, motor='auto'):
+    """
+    Base entera del espacio nulo de una matriz entera de NumPy con el motor pedido
+    (ver BalanceadorEcuacion._base_espacio_nulo). Devuelve (base, columnas_libres,
+    motor_usado); si el motor no certifica su resultado se usa el entero.
+    """
+    if motor != 'auto' and motor not in MOTORES:
+        raise ValueError(f"Motor de resolución desconocido: {motor}")
+    filas, num_columnas = matriz.tolist(), matriz.shape[1]
+    if motor == 'auto':
+        motor = elegir_motor(matriz)
+    resultado = MOTORES[motor](filas, num_columnas)
+    if resultado is None:
+        motor, resultado = 'entero', base_espacio_nulo(filas, num_columnas)
+    return resultado[0], resultado[1], motor
+
+
+def elegir_motor(matriz):
+    """
+    Elige el motor de espacio nulo para una matriz (arreglo de NumPy), según las
+    mediciones de benchmarks/motores_espacio_nulo.py:
+    - 'modular' cuando el rango puede llegar a RANGO_MOTOR_MODULAR (filas y columnas
+      desde ese valor): ahí la eliminación exacta arrastra enteros cada vez más grandes
+      y el levantamiento p-ádico es de 1.6 a 4 veces más rápido.
+    - 'entero' para el resto, que incluye toda ecuación química realista (el rango no
+      pasa de la cantidad de elementos, y con 20 elementos y 800 especies el entero
+      tarda la mitad que el modular), y para entradas que el modular no acepta.
+    'flotante' nunca resultó el más rápido (y con 50 especies o más suele no certificar),
+    así que solo se usa si se pide explícitamente.
+    """
+    num_filas, num_columnas = matriz.shape
+    if min(num_filas, num_columnas) < RANGO_MOTOR_MODULAR:
+        return 'entero'
+    if int(np.abs(matriz).max()) * num_filas >= 2 ** 32:
+        return 'entero'
+    return 'modular'
+
+
+def registrar_motor(nombre, funcion, certificar=True):
+    """
+    Agrega un motor de espacio nulo: funcion(filas, num_columnas) debe devolver
+    (base, columnas_libres) o None. Con certificar=True su resultado se verifica
+    antes de usarse (ver _certificar_base); pasar False solo si la función ya lo hace.
+    """
+    if nombre == 'auto':
+        raise ValueError("'auto' es un nombre reservado")
+    if certificar:
+        def funcion_certificada(filas, num_columnas):
+            resultado = funcion(filas, num_columnas)
+            if resultado is None or not _certificar_base(filas, num_columnas, *resultado):
+                return None
+            return resultado
+        MOTORES[nombre] = funcion_certificada
+    else:
+        MOTORES[nombre] = funcion
+
+
+def _certificar_base(filas, num_columnas, base, libres):
+    """
+    Comprueba exactamente que la base es la del espacio nulo: un vector primitivo por
+    columna libre, positivo en su columna y cero en las demás libres, A·x = 0 en enteros, y
+    tantos vectores como num_columnas - rango (el rango modular es una cota inferior).
+    """
+    if len(base) != len(libres):
+        return False
+    for vector, libre in zip(base, libres):
+        if len(vector) != num_columnas or vector[libre] <= 0 or vector_primitivo(vector) != vector:
+            return False
+        if any(vector[otra] for otra in libres if otra != libre):
+            return False
+        if not es_solucion(filas, vector):
+            return False
+    try:
+        return num_columnas - rango_modular(filas) == len(base)
+    except OverflowError:
+        # Entradas fuera de int64: se certifica con el rango exacto
+        return len(base_espacio_nulo(filas, num_columnas)[0]) == len(base)
+
+
+def nombre_variable(indice):
+    """
+    Nombre de la variable número 'indice' (desde 0), sin límite:
+    a, b, ..., z, aa, ab, ..., az, ba, ... (como las columnas de una planilla).
+    """
+    nombre = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        nombre = chr(ord('a') + resto) + nombre
+    return nombre
+
+
+def formula_de_conteo(compuesto):
+    """
+    Arma el texto de una fórmula a partir de su conteo (ej: {'H': 2, 'O': 1} -> 'H2O').
+    La carga se escribe al final como la lee el parser (ej: 'SO4^2-'; el electrón es 'e^-').
+    """
+    formula = "".join(f"{elem}{count}" if count > 1 else elem
+                      for elem, count in compuesto.items() if elem != ELEMENTO_CARGA)
+    carga = compuesto.get(ELEMENTO_CARGA, 0)
+    if carga:
+        formula = f"{formula or 'e'}^{abs(carga) if abs(carga) > 1 else ''}{'+' if carga > 0 else '-'}"
+    return formula
+
+
+def con_subindices(formula):
+    """Pasa a subíndices unicode los números de una fórmula, sin tocar su carga (ej: 'SO₄^2-')."""
+    cuerpo, separador, carga = formula.partition('^')
+    return cuerpo.translate(NORMAL_TO_SUB) + separador + carga
+
+
+def conteo_con_carga(especie):
+    """
+    Conteo de una EspecieQuimica para BalanceadorEcuacion: si tiene carga se agrega
+    el pseudo-elemento ELEMENTO_CARGA, así el balance de carga es una fila más de A
+    (y dos especies con la misma fórmula y distinta carga no son la misma).
+    """
+    if not especie.carga:
+        return especie.conteo
+    conteo = dict(especie.conteo)
+    conteo[ELEMENTO_CARGA] = especie.carga
+    return conteo
+
+
+def solucion_minima_positiva(base, libres, max_nodos=200000, tiempo_max=2.0, inicial=None):
+    """
+    Busca, dentro del retículo entero generado por el espacio nulo, la solución con
+    todos los coeficientes positivos y la menor suma posible, por ramificación y acotación.
+
+    Toda solución entera queda determinada por los valores t_k >= 1 de sus variables
+    libres (x = suma de t_k * base[k] / base[k][libres[k]]). Cada nodo fija las primeras
+    variables libres y resuelve de forma exacta la relajación lineal del resto (cada
+    pivote >= 1, t reales; ver minimizar_lineal), que da una cota inferior de la suma.
+    La variable siguiente se ramifica desde su valor relajado hacia abajo y hacia arriba,
+    y cada dirección se corta en cuanto la relajación no es factible o su cota alcanza a
+    la mejor solución (la cota es convexa en ese valor). La relajación de la raíz, llevada
+    a enteros, da además una solución positiva de partida.
+
+    Devuelve (coeficientes, agotado): coeficientes es [] si no existe ninguna solución
+    positiva, y agotado indica que se acabó el presupuesto de nodos o de tiempo antes
+    de probar que la solución es mínima. 'inicial' es una solución positiva conocida
+    que se usa como cota de partida (y se devuelve si no se mejora). Con max_nodos=0
+    solo se resuelve la raíz y se devuelve la solución de partida.
+    """
+    if not base:
+        return [], False
+    num_columnas = len(base[0])
+
+    # Vectores escalados a un denominador común: x = (suma t_k * escalados[k]) / comun
+    comun = 1
+    for vector, libre in zip(base, libres):
+        comun = comun * vector[libre] // gcd(comun, vector[libre])
+    escalados = [[x * (comun // vector[libre]) for x in vector] for vector, libre in zip(base, libres)]
+    columnas_libres = set(libres)
+    # Fila de cada pivote en función de t (pivote >= 1 equivale a fila·t >= comun) y
+    # objetivo: la suma de x es objetivo·t / comun
+    filas = [[vector[j] for vector in escalados] for j in range(num_columnas) if j not in columnas_libres]
+    objetivo = [sum(vector) for vector in escalados]
+
+    def relajacion(fijos):
+        """Cota inferior de la suma y valores t óptimos con las primeras variables fijas (None si no es factible)."""
+        k = len(fijos)
+        # Las variables sin fijar se escriben t = 1 + s, con s >= 0
+        lados = [comun - sum(a * t for a, t in zip(fila, fijos)) - sum(fila[k:]) for fila in filas]
+        resultado = minimizar_lineal(objetivo[k:], [fila[k:] for fila in filas], lados)
+        if resultado is None:
+            return None
+        valor, holguras = resultado
+        constante = sum(c * t for c, t in zip(objetivo, fijos)) + sum(objetivo[k:])
+        return (valor + constante) / comun, list(fijos) + [1 + s for s in holguras]
+
+    # Numeradores con todas las t en 1: en la relajación casi todas quedan en 1 (a lo sumo
+    # una holgura básica por fila), así que solo se suman las que se apartan
+    con_unos = [sum(columna) for columna in zip(*escalados)]
+
+    def coeficientes_de(t):
+        numeradores = con_unos
+        for tk, vector in zip(t, escalados):
+            if tk != 1:
+                numeradores = [n + (tk - 1) * v for n, v in zip(numeradores, vector)]
+        return [Fraction(n, comun) for n in numeradores]
+
+    raiz = relajacion([])
+    if raiz is None:
+        return [], False
+    # Solución de partida: los valores racionales de la relajación llevados a enteros primitivos
+    racionales = coeficientes_de(raiz[1])
+    escala = 1
+    for valor in racionales:
+        escala = escala * valor.denominator // gcd(escala, valor.denominator)
+    mejor = vector_primitivo([int(valor * escala) for valor in racionales])
+    if inicial and sum(inicial) < sum(mejor):
+        mejor = list(inicial)
+    mejor_suma = sum(mejor)
+
+    nodos = 0
+    limite_tiempo = time.perf_counter() + tiempo_max
+    PODADO, EXPLORADO, AGOTADO = range(3)
+
+    def explorar(fijos, relajado):
+        """Explora el subárbol con las primeras variables fijas; devuelve PODADO, EXPLORADO o AGOTADO."""
+        nonlocal nodos, mejor, mejor_suma
+        nodos += 1
+        if nodos > max_nodos or time.perf_counter() > limite_tiempo:
+            return AGOTADO
+        relajado = relajado or relajacion(fijos)
+        if relajado is None or relajado[0] > mejor_suma - 1:
+            return PODADO
+        cota, t = relajado
+        x = coeficientes_de(t)
+        if all(valor.denominator == 1 for valor in x):
+            # La relajación ya es entera: es la mejor solución del subárbol
+            if cota < mejor_suma:
+                mejor, mejor_suma = [int(valor) for valor in x], int(cota)
+            return EXPLORADO
+        k = len(fijos)
+        if k == len(escalados):
+            return EXPLORADO
+
+        centro = int(t[k])
+        for valores in (range(centro, 0, -1), count(centro + 1)):
+            for valor in valores:
+                estado = explorar(fijos + [valor], None)
+                if estado == AGOTADO:
+                    return AGOTADO
+                if estado == PODADO:
+                    break
+        return EXPLORADO
+
+    agotado = explorar([], raiz) == AGOTADO
+    return mejor, agotado
+
+
+def _razon_entera(valores_libres, base, libres, max_denominador):
+    """
+    Lleva los valores (reales) de las variables libres a la razón entera más cercana
+    con denominadores <= max_denominador y arma el vector entero primitivo que les
+    corresponde en el espacio nulo, orientado con suma positiva.
+    """
+    maximo = np.abs(valores_libres).max()
+    if maximo == 0:
+        return [0] * len(base[0])
+    fracciones = [Fraction(float(v / maximo)).limit_denominator(max_denominador) for v in valores_libres]
+    escala = 1
+    for fraccion in fracciones:
+        escala = escala * fraccion.denominator // gcd(escala, fraccion.denominator)
+
+    # x = suma f_k * base[k] / base[k][libre_k]; se multiplica por el denominador común
+    comun = 1
+    for vector, libre in zip(base, libres):
+        comun = comun * vector[libre] // gcd(comun, vector[libre])
+    vector = [0] * len(base[0])
+    for fraccion, vector_base, libre in zip(fracciones, base, libres):
+        factor = int(fraccion * escala) * (comun // vector_base[libre])
+        if factor:
+            vector = [x + factor * y for x, y in zip(vector, vector_base)]
+    vector = vector_primitivo(vector)
+    return vector if sum(vector) >= 0 else [-x for x in vector]
+
+
+def balancear_texto(ecuacion_str, max_nodos=200000, tiempo_max=2.0, cache=None, formatear=True):
+    """
+    Parsea y balancea una ecuación escrita como texto (ej: 'H2 + O2 -> H2O').
+    Nunca lanza excepciones: devuelve un diccionario con
+    'ecuacion', 'estado' ('ok', 'sin_solucion', 'presupuesto_agotado' o 'error'),
+    'coeficientes' (lista de enteros, vacía si no hay solución),
+    'balanceada' (texto de la ecuación balanceada o None), 'error' (mensaje o None),
+    'motivo' (código del triaje cuando la ecuación se descartó sin resolverla, o None)
+    y 'busqueda_agotada' (True si el presupuesto se terminó: con estado 'ok' los
+    coeficientes balancean pero no está probado que sean mínimos).
+    Si se pasa una CacheBalanceo, se consulta antes de resolver y se actualiza después
+    (solo con resultados completos: los de búsqueda agotada no se guardan).
+    Con formatear=False no se arma el texto balanceado ('balanceada' queda en None).
+    Con la instrumentación activa (ver modules.instrumentacion) se agrega 'registros',
+    con un registro por etapa (parseo, matriz, resolución, espacio nulo, minimización
+    y formato; solo las que se ejecutaron).
+    """
+    if not instrumentacion.esta_activa():
+        return _balancear_texto(ecuacion_str, max_nodos, tiempo_max, cache, formatear)
+    with instrumentacion.recolectar() as registros:
+        resultado = _balancear_texto(ecuacion_str, max_nodos, tiempo_max, cache, formatear)
+    resultado['registros'] = registros
+    return resultado
+
+
+def _balancear_texto(ecuacion_str, max_nodos, tiempo_max, cache, formatear):
+    """Cuerpo de balancear_texto (sin el recolector de la instrumentación)."""
+    resultado = {'ecuacion': ecuacion_str, 'estado': 'error', 'coeficientes': [],
+                 'balanceada': None, 'error': None, 'motivo': None, 'busqueda_agotada': False}
+    try:
+        especies_reactivos, especies_productos = parsear_ecuacion_completa(ecuacion_str)
+        balanceo = balancear_especies(especies_reactivos, especies_productos, max_nodos, tiempo_max, cache)
+    except Exception as e:
+        resultado['error'] = str(e)
+        return resultado
+
+    resultado['estado'] = balanceo.estado
+    resultado['motivo'] = balanceo.motivo['motivo'] if balanceo.motivo else None
+    resultado['busqueda_agotada'] = balanceo.busqueda_agotada
+    if balanceo:
+        resultado['coeficientes'] = list(balanceo.coeficientes)
+        if formatear:
+            resultado['balanceada'] = balanceo.ecuacion
+    return resultado
+
+
+def balancear_especies(especies_reactivos, especies_productos, max_nodos=200000, tiempo_max=2.0, cache=None):
+    """
+    Balancea en modo 'minimo' una ecuación ya parseada (listas de EspecieQuimica) y
+    devuelve un ResultadoBalanceo; es el camino común de balancear_texto y la interfaz.
+    Si se pasa una CacheBalanceo, se consulta antes de resolver (con el estado, el motivo
+    y los bloques sin solución guardados) y se actualiza después, salvo que la búsqueda
+    se haya agotado.
+    """
+    balanceador = BalanceadorEcuacion([conteo_con_carga(e) for e in especies_reactivos],
+                                      [conteo_con_carga(e) for e in especies_productos])
+    guardado = cache.obtener_resultado(especies_reactivos, especies_productos) if cache else None
+    if guardado is not None:
+        return ResultadoBalanceo(guardado['coeficientes'], balanceador, guardado['estado'], guardado['motivo'],
+                                 bloques_sin_solucion=guardado['bloques_sin_solucion'])
+    resultado = balanceador.balancear(modo='minimo', max_nodos=max_nodos, tiempo_max=tiempo_max)
+    if cache and not resultado.busqueda_agotada:
+        cache.guardar(especies_reactivos, especies_productos, resultado.coeficientes, resultado.estado,
+                      resultado.motivo, resultado.bloques_sin_solucion)
+    return resultado
+
+
+def balancear_muchas(ecuaciones, procesos=None, tamano_bloque=64, en_orden=True, ruta_cache=None,
+                    formatear=True):
+    """
+    Balancea un iterable de ecuaciones (texto) repartiendo el trabajo entre varios
+    procesos, y produce un resultado por ecuación (ver balancear_texto) con las claves
+    extra 'indice' (posición en la entrada) y 'tiempo' (segundos que llevó balancearla).
+    Los errores quedan en cada resultado; nunca se interrumpe el lote por una ecuación inválida.
+
+    - procesos: cantidad de procesos (None = núcleos disponibles; 1 = sin pool, en este proceso).
+    - tamano_bloque: ecuaciones que se envían juntas a cada proceso.
+    - en_orden: True para producir los resultados en el orden de entrada;
+      False para producirlos a medida que terminan los bloques.
+    - ruta_cache: archivo SQLite de una CacheBalanceo compartida por todos los procesos (opcional).
+    - formatear: False para no armar el texto balanceado (solo coeficientes).
+
+    La entrada se consume de forma perezosa: solo hay unos pocos bloques en vuelo a la vez.
+    Si la instrumentación está activa en este proceso también se activa en los del pool;
+    sus registros llegan en cada resultado y se suman al resumen de este proceso.
+    """
+    if tamano_bloque <= 0:
+        raise ValueError(f"El tamaño de bloque debe ser positivo: {tamano_bloque}")
+    procesos = procesos or os.cpu_count() or 1
+    bloques = _en_bloques(enumerate(ecuaciones), tamano_bloque)
+
+    if procesos == 1:
+        for bloque in bloques:
+            yield from _balancear_bloque(bloque, ruta_cache, formatear)
+        return
+
+    instrumentar = instrumentacion.esta_activa()
+    max_en_vuelo = 2 * procesos
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        pendientes = deque()
+        for bloque in bloques:
+            pendientes.append(ejecutor.submit(_balancear_bloque, bloque, ruta_cache, formatear, instrumentar))
+            if len(pendientes) >= max_en_vuelo:
+                yield from _incorporar_registros(_recoger(pendientes, en_orden))
+        while pendientes:
+            yield from _incorporar_registros(_recoger(pendientes, en_orden))
+
+
+def _recoger(pendientes, en_orden):
+    """Saca de la cola uno o más bloques terminados y produce sus resultados."""
+    if en_orden:
+        yield from pendientes.popleft().result()
+        return
+    terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+    for futuro in terminados:
+        pendientes.remove(futuro)
+        yield from futuro.result()
+
+
+def _incorporar_registros(resultados):
+    """Suma al resumen de este proceso los registros medidos en los procesos del pool."""
+    for resultado in resultados:
+        if 'registros' in resultado:
+            instrumentacion.incorporar(resultado['registros'])
+        yield resultado
+
+
+# Una CacheBalanceo por archivo SQLite dentro de cada proceso del pool
+_caches_de_proceso = {}
+
+
+def _balancear_bloque(bloque, ruta_cache=None, formatear=True, instrumentar=False):
+    """Balancea un bloque de pares (indice, ecuacion). Se ejecuta dentro de los procesos del pool."""
+    if instrumentar and not instrumentacion.esta_activa():
+        instrumentacion.activar()
+    cache = None
+    if ruta_cache:
+        cache = _caches_de_proceso.get(ruta_cache)
+        if cache is None:
+            cache = _caches_de_proceso[ruta_cache] = CacheBalanceo(ruta_sqlite=ruta_cache)
+    resultados = []
+    for indice, ecuacion in bloque:
+        inicio = time.perf_counter()
+        resultado = balancear_texto(ecuacion, cache=cache, formatear=formatear)
+        resultado['indice'] = indice
+        resultado['tiempo'] = time.perf_counter() - inicio
+        resultados.append(resultado)
+    return resultados
+
+
+def _en_bloques(iterable, tamano):
+    """Agrupa un iterable en listas de a lo sumo 'tamano' elementos."""
+    iterador = iter(iterable)
+    while True:
+        bloque = list(islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+# Ejecutor de las funciones async (None = el ejecutor por defecto del event loop)
+_ejecutor_async = None
+# Cálculos en curso por event loop: clave -> [futuro, cantidad de llamadas esperándolo]
+_en_vuelo = weakref.WeakKeyDictionary()
+
+
+def configurar_ejecutor_async(ejecutor):
+    """
+    Fija el ejecutor (ThreadPoolExecutor, ProcessPoolExecutor o None para el del
+    event loop) que usan parsear_async y balancear_async cuando no se les pasa uno.
+    """
+    global _ejecutor_async
+    _ejecutor_async = ejecutor
+
+
+async def parsear_async(ecuacion_str, timeout=None, ejecutor=None):
+    """
+    Versión async de parsear_ecuacion_completa: el parseo corre en el ejecutor y no
+    bloquea el event loop. Devuelve (reactivos, productos) como la versión síncrona.
+    timeout (segundos) lanza TimeoutError; ver _ejecutar_compartido.
+    """
+    lados = await _ejecutar_compartido(('parseo', ecuacion_str), partial(_parsear_serializable, ecuacion_str),
+                                       timeout, ejecutor)
+    return tuple([EspecieQuimica(formula, MappingProxyType(conteo), *resto) for formula, conteo, *resto in lado]
+                 for lado in lados)
+
+
+async def balancear_async(ecuacion_str, max_nodos=200000, tiempo_max=2.0, timeout=None, ejecutor=None,
+                          formatear=True):
+    """
+    Versión async de balancear_texto: el balanceo corre en el ejecutor y devuelve el
+    mismo diccionario (una copia por llamada, aunque el cálculo se comparta).
+    timeout (segundos) lanza TimeoutError; ver _ejecutar_compartido.
+    """
+    resultado = await _ejecutar_compartido(
+        ('balanceo', ecuacion_str, max_nodos, tiempo_max, formatear),
+        partial(balancear_texto, ecuacion_str, max_nodos, tiempo_max, formatear=formatear),
+        timeout, ejecutor)
+    return dict(resultado, coeficientes=list(resultado['coeficientes']))
+
+
+async def _ejecutar_compartido(clave, funcion, timeout, ejecutor):
+    """
+    Ejecuta funcion en el ejecutor, compartiendo el cálculo entre las llamadas
+    concurrentes con la misma clave: la primera lo lanza y las demás esperan el mismo
+    resultado. Cancelar una llamada o agotar su timeout no afecta a las demás; si no
+    queda ninguna esperando, se cancela el cálculo (si todavía no empezó).
+    """
+    loop = asyncio.get_running_loop()
+    en_vuelo = _en_vuelo.setdefault(loop, {})
+    entrada = en_vuelo.get(clave)
+    if entrada is None:
+        futuro = loop.run_in_executor(ejecutor or _ejecutor_async, funcion)
+        entrada = en_vuelo[clave] = [futuro, 0]
+        futuro.add_done_callback(lambda _: en_vuelo.pop(clave, None) if en_vuelo.get(clave) is entrada else None)
+    futuro = entrada[0]
+    entrada[1] += 1
+    try:
+        return await asyncio.wait_for(asyncio.shield(futuro), timeout)
+    finally:
+        entrada[1] -= 1
+        if entrada[1] == 0 and not futuro.done():
+            futuro.cancel()
+
+
+def _parsear_serializable(ecuacion_str):
+    """Parsea y devuelve las especies como tuplas con conteos dict (se pueden enviar entre procesos)."""
+    return tuple([(e.formula, dict(e.conteo), e.carga, e.coeficiente, e.inicio, e.fin) for e in lado]
+                 for lado in parsear_ecuacion_completa(ecuacion_str))
+
+
+def main(argumentos=None):
+    """
+    Balanceador por lotes sin interfaz gráfica:
+        python -m modules.balanceo [archivos...] [opciones]
+    Lee una ecuación por línea de los archivos (o de la entrada estándar si no se
+    indican o con '-'), ignorando líneas vacías y comentarios '#', y escribe por la
+    salida estándar un objeto JSON por línea (ver balancear_muchas) con el archivo
+    y la línea de origen. Devuelve 1 si alguna ecuación dio error, 0 si no.
+    Con --instrumentar cada resultado lleva sus 'registros' por etapa y al final se
+    escribe por la salida de errores el resumen por etapa (JSON).
+    """
+    lector = argparse.ArgumentParser(
+        prog='python -m modules.balanceo',
+        description="Balancea ecuaciones químicas por lotes y escribe los resultados en JSON Lines.")
+    lector.add_argument('archivos', nargs='*', default=['-'],
+                        help="archivos con una ecuación por línea ('-' = entrada estándar)")
+    lector.add_argument('-p', '--procesos', type=entero_positivo, default=None,
+                        help="cantidad de procesos (por defecto, los núcleos disponibles; 1 = sin pool)")
+    lector.add_argument('-b', '--tamano-bloque', type=entero_positivo, default=64,
+                        help="ecuaciones que se envían juntas a cada proceso (por defecto 64)")
+    lector.add_argument('--fallar-rapido', action='store_true',
+                        help="detenerse en la primera ecuación con error")
+    lector.add_argument('--sin-orden', action='store_true',
+                        help="escribir los resultados a medida que terminan, sin respetar el orden de entrada")
+    lector.add_argument('--cache', metavar='RUTA', default=None,
+                        help="archivo SQLite de caché compartida entre procesos y ejecuciones")
+    lector.add_argument('--sin-formato', action='store_true',
+                        help="no armar el texto de la ecuación balanceada (solo coeficientes)")
+    lector.add_argument('--instrumentar', action='store_true',
+                        help="medir el tiempo de cada etapa y escribir el resumen en la salida de errores")
+    opciones = lector.parse_args(argumentos)
+    if opciones.instrumentar:
+        instrumentacion.activar()
+
+    origenes = {}
+    ecuaciones = _leer_ecuaciones(opciones.archivos, origenes)
+    hubo_error = False
+    for resultado in balancear_muchas(ecuaciones, procesos=opciones.procesos,
+                                      tamano_bloque=opciones.tamano_bloque, en_orden=not opciones.sin_orden,
+                                      ruta_cache=opciones.cache, formatear=not opciones.sin_formato):
+        resultado['archivo'], resultado['linea'] = origenes.pop(resultado['indice'])
+        sys.stdout.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+        if resultado['estado'] == 'error':
+            hubo_error = True
+            if opciones.fallar_rapido:
+                break
+    if opciones.instrumentar:
+        sys.stderr.write(json.dumps(instrumentacion.resumen(), ensure_ascii=False) + "\n")
+    return 1 if hubo_error else 0
+
+
+def _leer_ecuaciones(archivos, origenes):
+    """
+    Produce las ecuaciones de los archivos, una por línea no vacía, y anota en
+    origenes[indice] el (archivo, línea) de cada una.
+    """
+    indice = 0
+    for archivo in archivos:
+        manejador = sys.stdin if archivo == '-' else open(archivo, encoding='utf-8')
+        try:
+            for numero, linea in enumerate(manejador, start=1):
+                ecuacion = linea.strip()
+                if not ecuacion or ecuacion.startswith('#'):
+                    continue
+                origenes[indice] = (archivo, numero)
+                indice += 1
+                yield ecuacion
+        finally:
+            if manejador is not sys.stdin:
+                manejador.close()
+
+
+if __name__ == '__main__':
+    # Se usa el módulo importado (no __main__) para que el pool de procesos encuentre sus funciones
+    from modules.balanceo import main as _main
+    sys.exit(_main())
@@ -0,0 +1,145 @@
+import json
+import os
+import sqlite3
+import threading
+from modules.parser import clave_especie
+from modules.utils import CacheLRU
+
+
+class CacheBalanceo:
+    """
+    Caché de resultados de balanceo que no depende del orden de las especies.
+    La clave es el multiconjunto canónico (notación de Hill) de reactivos y productos,
+    así que 'O2 + H2 -> H2O' reutiliza el resultado de 'H2 + O2 -> H2O'; al acertar,
+    los coeficientes guardados se reordenan según el orden de quien consulta.
+
+    Tiene dos niveles: una caché LRU en memoria y, opcionalmente, un archivo SQLite
+    que pueden compartir varios procesos (por ejemplo, los de balancear_muchas).
+    Junto a los coeficientes se guardan el estado ('ok' o 'sin_solucion'), el motivo
+    del triaje y los bloques sin solución, para poder explicar una falla sin resolver
+    de nuevo; los índices de especies también se reordenan para quien consulta.
+    """
+    def __init__(self, capacidad=4096, ruta_sqlite=None):
+        self.memoria = CacheLRU(capacidad)
+        self.ruta_sqlite = ruta_sqlite
+        self._conexion = None
+        self._pid_conexion = None
+        self._candado = threading.Lock()
+
+    def obtener(self, reactivos, productos):
+        """
+        Devuelve los coeficientes guardados para la ecuación, en el orden de las especies
+        recibidas ([] si se sabe que no tiene solución), o None si no está en la caché.
+        Las especies pueden ser textos de fórmulas o EspecieQuimica.
+        """
+        resultado = self.obtener_resultado(reactivos, productos)
+        return None if resultado is None else resultado['coeficientes']
+
+    def obtener_resultado(self, reactivos, productos):
+        """
+        Como obtener, pero devuelve todo lo guardado: un diccionario con 'coeficientes',
+        'estado', 'motivo' (diccionario del triaje o None) y 'bloques_sin_solucion'
+        (listas de índices de especies), en el orden de las especies recibidas.
+        """
+        clave, orden = self._clave(reactivos, productos)
+        entrada = self.memoria.obtener(clave)
+        if entrada is None and self.ruta_sqlite:
+            entrada = self._leer_sqlite(clave)
+            if entrada is not None:
+                self.memoria.guardar(clave, entrada)
+        if entrada is None:
+            return None
+
+        coeficientes = [0] * len(orden) if entrada['coeficientes'] else []
+        for posicion, coeficiente in zip(orden, entrada['coeficientes']):
+            coeficientes[posicion] = coeficiente
+        motivo = entrada['motivo']
+        if motivo is not None:
+            motivo = dict(motivo, especies=[orden[k] for k in motivo['especies']],
+                          elementos=list(motivo['elementos']))
+        return {'coeficientes': coeficientes, 'estado': entrada['estado'], 'motivo': motivo,
+                'bloques_sin_solucion': [sorted(orden[k] for k in bloque)
+                                         for bloque in entrada['bloques_sin_solucion']]}
+
+    def guardar(self, reactivos, productos, coeficientes, estado=None, motivo=None, bloques_sin_solucion=()):
+        """
+        Guarda un resultado (coeficientes e índices en el orden de las especies recibidas)
+        en ambos niveles. Sin estado se usa 'ok' si hay coeficientes y 'sin_solucion' si no.
+        """
+        clave, orden = self._clave(reactivos, productos)
+        canonica = {posicion: k for k, posicion in enumerate(orden)}
+        if motivo is not None:
+            motivo = dict(motivo, especies=[canonica[j] for j in motivo['especies']],
+                          elementos=list(motivo['elementos']))
+        entrada = {
+            'coeficientes': tuple(coeficientes[posicion] for posicion in orden) if coeficientes else (),
+            'estado': estado or ('ok' if coeficientes else 'sin_solucion'),
+            'motivo': motivo,
+            'bloques_sin_solucion': tuple(tuple(sorted(canonica[j] for j in bloque))
+                                          for bloque in bloques_sin_solucion),
+        }
+        self.memoria.guardar(clave, entrada)
+        if self.ruta_sqlite:
+            self._escribir_sqlite(clave, entrada)
+
+    def limpiar(self):
+        """Vacía la caché en memoria y, si existe, la tabla SQLite."""
+        self.memoria.limpiar()
+        if self.ruta_sqlite:
+            with self._candado:
+                conexion = self._obtener_conexion()
+                with conexion:
+                    conexion.execute("DELETE FROM resultados")
+
+    def estadisticas(self):
+        """Estadísticas de la caché en memoria (ver CacheLRU.estadisticas)."""
+        return self.memoria.estadisticas()
+
+    @staticmethod
+    def _clave(reactivos, productos):
+        """
+        Arma la clave canónica de la ecuación y la permutación que lleva del orden
+        canónico al orden de quien consulta.
+        """
+        claves_reactivos = [clave_especie(e) for e in reactivos]
+        claves_productos = [clave_especie(e) for e in productos]
+        orden_reactivos = sorted(range(len(reactivos)), key=claves_reactivos.__getitem__)
+        orden_productos = sorted(range(len(productos)), key=claves_productos.__getitem__)
+
+        clave = (" + ".join(claves_reactivos[i] for i in orden_reactivos) + " -> "
+                 + " + ".join(claves_productos[i] for i in orden_productos))
+        orden = orden_reactivos + [len(reactivos) + i for i in orden_productos]
+        return clave, orden
+
+    def _obtener_conexion(self):
+        # Se abre una conexión por proceso (las conexiones SQLite no sobreviven a un fork)
+        if self._conexion is None or self._pid_conexion != os.getpid():
+            conexion = sqlite3.connect(self.ruta_sqlite, timeout=30, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS resultados (clave TEXT PRIMARY KEY, coeficientes TEXT NOT NULL)")
+            self._conexion = conexion
+            self._pid_conexion = os.getpid()
+        return self._conexion
+
+    def _leer_sqlite(self, clave):
+        with self._candado:
+            fila = self._obtener_conexion().execute(
+                "SELECT coeficientes FROM resultados WHERE clave = ?", (clave,)).fetchone()
+        if not fila:
+            return None
+        datos = json.loads(fila[0])
+        if isinstance(datos, list):
+            # Archivos anteriores: solo la lista de coeficientes
+            return {'coeficientes': tuple(datos), 'estado': 'ok' if datos else 'sin_solucion',
+                    'motivo': None, 'bloques_sin_solucion': ()}
+        datos['coeficientes'] = tuple(datos['coeficientes'])
+        return datos
+
+    def _escribir_sqlite(self, clave, entrada):
+        with self._candado:
+            conexion = self._obtener_conexion()
+            with conexion:
+                conexion.execute("INSERT OR REPLACE INTO resultados (clave, coeficientes) VALUES (?, ?)",
+                                 (clave, json.dumps(entrada)))
+
@@ -0,0 +1,158 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from modules.algebra_entera import base_espacio_nulo
+from modules.balanceo import BalanceadorEcuacion, calcular_espacio_nulo, conteo_con_carga
+from modules.parser import clave_especie, parsear_molecula_cacheada
+
+
+def enumerar_reacciones(especies, modo='base', limite=1000, tiempo_max=10.0, procesos=None, max_especies=None):
+    """
+    Enumera reacciones balanceadas que se pueden formar con un conjunto de especies
+    sin separar reactivos de productos (ej: todo lo observado en un reactor).
+    Las especies son textos de fórmulas o EspecieQuimica (con carga); las repetidas
+    (misma fórmula canónica) se cuentan una sola vez.
+
+    Modos:
+    - 'base': un conjunto de reacciones independientes (base entera del espacio nulo
+      de A, la matriz elementos x especies de construir_matriz); no hay combinatoria.
+    - 'elementales': todas las reacciones de soporte mínimo (ninguna sub-reacción
+      usa un subconjunto propio de sus especies), de menos a más especies y, a igual
+      cantidad, de menor a mayor suma de coeficientes. Se prueban los subconjuntos
+      de especies por tamaño creciente, repartidos entre 'procesos' procesos (None =
+      núcleos disponibles; 1 = sin pool); limite y tiempo_max cortan la búsqueda y
+      max_especies acota la cantidad de especies de cada reacción.
+
+    Cada reacción es un diccionario con 'coeficientes' (uno por especie distinta, en
+    el orden de entrada: positivo = reactivo, negativo = producto, 0 = no participa)
+    y 'ecuacion' (texto). Cada reacción aparece una sola vez, orientada para que su
+    primera especie sea reactivo. Devuelve (reacciones, agotado); agotado indica que
+    hay más reacciones que 'limite' (se devuelven las primeras) o que el tiempo se
+    terminó antes de completar la enumeración.
+    """
+    if modo not in ('base', 'elementales'):
+        raise ValueError(f"Modo de enumeración desconocido: {modo}")
+    etiquetas, conteos = _preparar_especies(especies)
+    matriz, _ = BalanceadorEcuacion(conteos, []).construir_matriz()
+
+    if modo == 'base':
+        base, _, _ = calcular_espacio_nulo(matriz) if conteos else ([], [], None)
+        reacciones = sorted((_orientar(vector) for vector in base), key=_orden_reaccion)
+        agotado = len(reacciones) > limite
+        return [_reaccion(vector, etiquetas) for vector in reacciones[:limite]], agotado
+
+    limite_tiempo = time.time() + tiempo_max
+    filas = matriz.tolist()
+    num_especies = len(conteos)
+    rango = num_especies - len(calcular_espacio_nulo(matriz)[0]) if conteos else 0
+    # Una reacción elemental tiene a lo sumo rango + 1 especies
+    tamano_maximo = min(rango + 1, max_especies or num_especies)
+
+    encontradas, agotado = [], False
+    procesos = procesos or os.cpu_count() or 1
+    ejecutor = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    try:
+        for tamano in range(2, tamano_maximo + 1):
+            # Una tarea por primera especie del subconjunto; cada una busca hasta una
+            # reacción más de las que faltan, para saber si el límite corta la enumeración
+            tareas = [(filas, num_especies, tamano, primera, limite - len(encontradas), limite_tiempo)
+                      for primera in range(num_especies - tamano + 1)]
+            if ejecutor is not None:
+                resultados = ejecutor.map(_circuitos_desde, tareas)
+            else:
+                resultados = map(_circuitos_desde, tareas)
+            del_tamano = []
+            for circuitos, tarea_agotada in resultados:
+                del_tamano.extend(circuitos)
+                agotado = agotado or tarea_agotada
+            encontradas.extend(sorted(del_tamano, key=_orden_reaccion))
+            if agotado or len(encontradas) > limite:
+                break
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown(cancel_futures=True)
+
+    if len(encontradas) > limite:
+        encontradas, agotado = encontradas[:limite], True
+    return [_reaccion(vector, etiquetas) for vector in encontradas], agotado
+
+
+def _preparar_especies(especies):
+    """
+    Quita las especies repetidas y devuelve (etiquetas, conteos); si alguna especie
+    tiene carga, el conteo incluye el pseudo-elemento ELEMENTO_CARGA.
+    """
+    etiquetas, conteos, vistas = [], [], set()
+    for especie in especies:
+        clave = clave_especie(especie)
+        if clave in vistas:
+            continue
+        vistas.add(clave)
+        if isinstance(especie, str):
+            etiquetas.append(especie)
+            conteos.append(dict(parsear_molecula_cacheada(especie)))
+        else:
+            etiquetas.append(especie.formula if not especie.carga else clave)
+            conteos.append(dict(conteo_con_carga(especie)))
+    return etiquetas, conteos
+
+
+def _circuitos_desde(tarea):
+    """
+    Prueba los subconjuntos de 'tamano' especies cuya primera especie es 'primera'
+    y devuelve (circuitos, agotado). Un subconjunto es una reacción elemental si su
+    submatriz tiene un espacio nulo de dimensión 1 cuyo vector usa todas las especies.
+    Se detiene al encontrar limite + 1 circuitos (agotado = True, con los limite + 1),
+    así quien llama sabe que hay más; también si se termina el tiempo.
+    Se ejecuta dentro de los procesos del pool.
+    """
+    filas, num_especies, tamano, primera, limite, limite_tiempo = tarea
+    # Máscara de bits de los elementos de cada especie, para descartar rápido los
+    # subconjuntos donde algún elemento aparece en una sola especie
+    mascaras = [sum(1 << i for i, fila in enumerate(filas) if fila[j]) for j in range(num_especies)]
+    circuitos = []
+    for contador, resto in enumerate(combinations(range(primera + 1, num_especies), tamano - 1)):
+        if contador % 256 == 0 and time.time() > limite_tiempo:
+            return circuitos, True
+        soporte = (primera,) + resto
+        una, dos = 0, 0
+        for j in soporte:
+            dos |= una & mascaras[j]
+            una |= mascaras[j]
+        if una != dos:
+            continue
+
+        submatriz = [[fila[j] for j in soporte] for fila in filas if any(fila[j] for j in soporte)]
+        base, _ = base_espacio_nulo(submatriz, tamano)
+        if len(base) != 1 or not all(base[0]):
+            continue
+        vector = [0] * num_especies
+        for j, valor in zip(soporte, base[0]):
+            vector[j] = valor
+        circuitos.append(_orientar(vector))
+        if len(circuitos) > limite:
+            return circuitos, True
+    return circuitos, False
+
+
+def _orientar(vector):
+    """Orienta la reacción para que su primera especie sea reactivo (coeficiente positivo)."""
+    primero = next((x for x in vector if x), 0)
+    return vector if primero > 0 else [-x for x in vector]
+
+
+def _orden_reaccion(vector):
+    """Clave de orden: cantidad de especies, suma de coeficientes y especies usadas."""
+    soporte = [j for j, x in enumerate(vector) if x]
+    return len(soporte), sum(abs(x) for x in vector), soporte
+
+
+def _reaccion(vector, etiquetas):
+    """Arma el diccionario de una reacción a partir de su vector de coeficientes."""
+    def termino(coeficiente, etiqueta):
+        return f"{coeficiente}{etiqueta}" if coeficiente > 1 else etiqueta
+
+    reactivos = [termino(x, etiqueta) for x, etiqueta in zip(vector, etiquetas) if x > 0]
+    productos = [termino(-x, etiqueta) for x, etiqueta in zip(vector, etiquetas) if x < 0]
+    return {'coeficientes': list(vector), 'ecuacion': f"{' + '.join(reactivos)} → {' + '.join(productos)}"}
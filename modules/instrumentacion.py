@@ -0,0 +1,201 @@
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+import numpy as np
+
+# Cantidad de mediciones por etapa que se guardan para calcular percentiles
+VENTANA_RESUMEN = 10000
+
+# Etapas instrumentables: (módulo, clase o None, atributo, nombre de la etapa).
+# resolucion incluye espacio_nulo y minimizacion (y la matriz, si no estaba construida)
+ETAPAS = [
+    ('modules.parser', None, 'parsear_ecuacion_completa', 'parseo'),
+    ('modules.balanceo', 'BalanceadorEcuacion', 'construir_matriz', 'matriz'),
+    ('modules.balanceo', 'BalanceadorEcuacion', 'resolver', 'resolucion'),
+    ('modules.balanceo', 'BalanceadorEcuacion', '_base_espacio_nulo', 'espacio_nulo'),
+    ('modules.balanceo', None, 'solucion_minima_positiva', 'minimizacion'),
+    ('modules.balanceo', 'BalanceadorEcuacion', 'formatear_ecuacion_balanceada', 'formato'),
+    ('modules.balanceo', 'BalanceadorEcuacion', 'obtener_ecuacion_con_variables', 'formato'),
+    ('modules.balanceo', 'BalanceadorEcuacion', 'obtener_ecuacion_texto', 'formato'),
+]
+
+_candado = threading.Lock()
+_originales = {}        # (módulo, clase, atributo) -> función sin instrumentar
+_mediciones = {}        # etapa -> {'cantidad', 'max', 'paredes' (ventana)}
+# Listas de los recolectores activos (del más externo al más interno)
+_recolectores = ContextVar('recolectores', default=())
+# Registros por etapa de la llamada instrumentada de nivel superior en curso
+_llamada = ContextVar('llamada', default=None)
+
+
+def activar():
+    """
+    Activa la instrumentación: reemplaza cada etapa de ETAPAS por una versión que
+    mide su tiempo de pared y de CPU (del hilo). Mientras está desactivada las
+    funciones originales quedan intactas, así que no hay ningún costo extra.
+    """
+    with _candado:
+        if _originales:
+            return
+        for modulo, clase, atributo, etapa in ETAPAS:
+            duenio = _duenio(modulo, clase)
+            original = getattr(duenio, atributo)
+            _originales[(modulo, clase, atributo)] = original
+            _reemplazar(duenio, atributo, original, _medida(original, etapa))
+
+
+def desactivar():
+    """Vuelve a poner las funciones originales (el resumen acumulado se conserva)."""
+    with _candado:
+        for (modulo, clase, atributo), original in _originales.items():
+            duenio = _duenio(modulo, clase)
+            _reemplazar(duenio, atributo, getattr(duenio, atributo), original)
+        _originales.clear()
+
+
+def esta_activa():
+    """Indica si las etapas están instrumentadas."""
+    return bool(_originales)
+
+
+@contextmanager
+def recolectar(registros=None):
+    """
+    Junta en una lista (nueva, o la que se pase) los registros de las etapas que se
+    ejecutan dentro del bloque (en el mismo hilo o tarea), uno por etapa. Cada registro
+    es un diccionario con 'etapa', 'pared' y 'cpu' (segundos), 'llamadas' y, según la
+    etapa, 'forma' (de la matriz A), 'dimension_nulo' y 'motor' (de la primera llamada).
+    Las etapas pueden anidarse (resolver construye la matriz y calcula el espacio nulo);
+    una etapa dentro de sí misma (resolver por bloques) se mide solo en la externa, y las
+    llamadas repetidas (un espacio nulo por bloque) se suman en el mismo registro.
+    Los recolectores pueden anidarse: cada registro llega a todos los activos.
+    """
+    registros = [] if registros is None else registros
+    token = _recolectores.set(_recolectores.get() + (registros,))
+    try:
+        yield registros
+    finally:
+        _recolectores.reset(token)
+
+
+def resumen():
+    """
+    Resumen de todo el proceso por etapa: {'cantidad', 'p50', 'p95', 'max'}, con los
+    tiempos de pared en segundos (los percentiles, sobre las últimas VENTANA_RESUMEN).
+    """
+    with _candado:
+        copia = {etapa: (datos['cantidad'], datos['max'], np.array(datos['paredes']))
+                 for etapa, datos in _mediciones.items()}
+    return {etapa: {'cantidad': cantidad, 'p50': float(np.percentile(paredes, 50)),
+                    'p95': float(np.percentile(paredes, 95)), 'max': maximo}
+            for etapa, (cantidad, maximo, paredes) in copia.items()}
+
+
+def incorporar(registros):
+    """
+    Suma al resumen de este proceso registros medidos en otro (por ejemplo, los que
+    devuelven los procesos de un pool en el resultado de balancear_texto).
+    """
+    for registro in registros:
+        _resumir(registro)
+
+
+def reiniciar_resumen():
+    """Borra las mediciones acumuladas."""
+    with _candado:
+        _mediciones.clear()
+
+
+def _medida(funcion, etapa):
+    """
+    Envoltura que mide una llamada. Las etapas de una llamada de nivel superior se
+    acumulan en un registro por etapa, que se entrega al resumen y al recolector activo
+    cuando esa llamada termina.
+    """
+    @wraps(funcion)
+    def medida(*args, **kwargs):
+        llamada = _llamada.get()
+        if llamada is not None and etapa in llamada['activas']:
+            # La misma etapa anidada (ej: resolver de cada bloque): ya la mide la llamada externa
+            return funcion(*args, **kwargs)
+        token = None
+        if llamada is None:
+            llamada = {'activas': set(), 'registros': {}}
+            token = _llamada.set(llamada)
+        registro = llamada['registros'].setdefault(
+            etapa, {'etapa': etapa, 'pared': 0.0, 'cpu': 0.0, 'llamadas': 0})
+        llamada['activas'].add(etapa)
+        inicio_cpu, inicio = time.thread_time(), time.perf_counter()
+        try:
+            resultado = funcion(*args, **kwargs)
+            if not registro['llamadas']:
+                _detallar(registro, args, resultado)
+            return resultado
+        finally:
+            registro['pared'] += time.perf_counter() - inicio
+            registro['cpu'] += time.thread_time() - inicio_cpu
+            registro['llamadas'] += 1
+            llamada['activas'].discard(etapa)
+            if token is not None:
+                _llamada.reset(token)
+                for registro_etapa in llamada['registros'].values():
+                    _registrar(registro_etapa)
+    medida.sin_instrumentar = funcion
+    return medida
+
+
+def _detallar(registro, args, resultado):
+    """Agrega al registro los datos propios de su etapa."""
+    if registro['etapa'] == 'matriz':
+        registro['forma'] = list(resultado[0].shape)
+    elif registro['etapa'] == 'resolucion':
+        balanceador = args[0]
+        registro['forma'] = [len(balanceador.elementos_unicos), len(balanceador.todos_los_compuestos)]
+        registro['dimension_nulo'] = balanceador.dimension_nulo
+        registro['motor'] = balanceador.motor_usado
+
+
+def _registrar(registro):
+    for recolector in _recolectores.get():
+        anterior = next((otro for otro in recolector if otro['etapa'] == registro['etapa']), None)
+        if anterior is None:
+            recolector.append(dict(registro))
+        else:
+            for clave in ('pared', 'cpu', 'llamadas'):
+                anterior[clave] += registro[clave]
+    _resumir(registro)
+
+
+def _resumir(registro):
+    """Agrega un registro al resumen del proceso."""
+    with _candado:
+        datos = _mediciones.get(registro['etapa'])
+        if datos is None:
+            datos = _mediciones[registro['etapa']] = {
+                'cantidad': 0, 'max': 0.0, 'paredes': deque(maxlen=VENTANA_RESUMEN)}
+        datos['cantidad'] += 1
+        datos['max'] = max(datos['max'], registro['pared'])
+        datos['paredes'].append(registro['pared'])
+
+
+def _duenio(modulo, clase):
+    """Módulo o clase donde vive el atributo de una etapa."""
+    duenio = sys.modules.get(modulo) or __import__(modulo, fromlist=['_'])
+    return getattr(duenio, clase) if clase else duenio
+
+
+def _reemplazar(duenio, atributo, actual, nuevo):
+    """
+    Cambia el atributo en su dueño. Para funciones de módulo también se cambian los
+    módulos que la importaron por nombre (from modules.parser import ...).
+    """
+    setattr(duenio, atributo, nuevo)
+    if isinstance(duenio, type):
+        return
+    for modulo in list(sys.modules.values()):
+        if modulo is not duenio and getattr(modulo, atributo, None) is actual:
+            setattr(modulo, atributo, nuevo)
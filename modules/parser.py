@@ -1,89 +1,438 @@
+import csv
 import re
+import sys
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+import numpy as np
+from modules.utils import CacheLRU, RUTA_ELEMENTOS, SUB_TO_NORMAL
 
-def parsear_ecuacion(molecula_str):
+# Tokens de una fórmula química, reconocidos en una sola pasada:
+# ([A-Z][a-z]?)(\d*) : Símbolo de elemento y su subíndice opcional (ej: 'Fe', 'O4')
+# | ([(\[])          : Apertura de grupo, paréntesis o corchete
+# | ([)\]])(\d*)     : Cierre de grupo y su multiplicador opcional (ej: ')2', ']')
+# | (\s+)            : Espacios, se ignoran
+_PATRON_TOKEN = re.compile(r'([A-Z][a-z]?)(\d*)|([(\[])|([)\]])(\d*)|(\s+)')
+
+# Cierre esperado para cada apertura de grupo
+_CIERRES = {'(': ')', '[': ']'}
+
+# Piezas de una ecuación completa, reconocidas en una sola pasada:
+# coeficiente opcional, cuerpo de la fórmula (o el electrón 'e') y carga opcional.
+# La carga puede escribirse '^2-', '{3+}' o como signo final ('Cl-', 'Fe3+').
+# El signo final solo es carga si le sigue el fin, un espacio, otro signo o una flecha;
+# así 'H2+O2' se sigue leyendo como dos especies.
+_PATRON_ESPECIE = re.compile(r'''
+    (?P<coeficiente>\d+)?\s*
+    (?P<formula>[A-Z(\[][A-Za-z0-9()\[\]]*|e(?=[\^{+-]))
+    (?:
+        \^(?P<carga_exp>\d*[+-])
+      | \{(?P<carga_llave>\d*[+-]|[+-]\d*)\}
+      | (?P<carga_signo>[+-])(?=$|\s|[+=<→⇌↔⟶⇄]|-(?!>))
+    )?
+''', re.VERBOSE)
+_PATRON_SEPARADOR = re.compile(r'\s*\+\s*')
+_PATRON_FLECHA = re.compile(r'\s*(<=>|<->|<-->|-->|->|=>|=|→|⟶|⇌|↔|⇄)\s*')
+_PATRON_ESPACIOS = re.compile(r'\s*')
+# Elemento solo con dígitos finales ('Fe3' en 'Fe3+'): los dígitos son la carga
+_PATRON_ION_MONOATOMICO = re.compile(r'([A-Z][a-z]?)(\d+)$')
+
+# Especie de una ecuación: fórmula tal como se escribió (sin coeficiente ni carga),
+# conteo de elementos (solo lectura), carga neta, coeficiente escrito por el usuario
+# (None si no hay) e intervalo [inicio, fin) que ocupa dentro del texto.
+EspecieQuimica = namedtuple('EspecieQuimica', ['formula', 'conteo', 'carga', 'coeficiente', 'inicio', 'fin'])
+
+# Caché de moléculas ya parseadas, compartida por todo el proceso
+CAPACIDAD_CACHE_PARSEO = 4096
+_cache_parseo = CacheLRU(CAPACIDAD_CACHE_PARSEO)
+
+
+class ErrorParseo(ValueError):
+    """
+    Error de sintaxis en una fórmula o ecuación.
+    Guarda la posición (índice de carácter) donde se detectó el problema.
+    """
+    def __init__(self, mensaje, posicion):
+        super().__init__(mensaje)
+        self.posicion = posicion
+
+
+class TablaSimbolos:
+    """
+    Tabla de símbolos de elementos con identificadores enteros densos
+    (0 = H, 1 = He, ... en orden de número atómico) y sus masas atómicas.
+    Los símbolos se internan, así que las comparaciones y hashes son baratos.
+    Se construye una sola vez por proceso con obtener_tabla_simbolos().
+    """
+    def __init__(self, simbolos, masas):
+        self.simbolos = tuple(sys.intern(simbolo) for simbolo in simbolos)
+        self.ids = {simbolo: i for i, simbolo in enumerate(self.simbolos)}
+        self.masas = np.asarray(masas, dtype=float)
+        self.masas.flags.writeable = False
+
+    def __len__(self):
+        return len(self.simbolos)
+
+    def __contains__(self, simbolo):
+        return simbolo in self.ids
+
+    def id_de(self, simbolo):
+        """Devuelve el identificador entero de un símbolo (KeyError si no existe)."""
+        return self.ids[simbolo]
+
+    def masa_molar(self, ids, conteos):
+        """Masa molar (g/mol) de una molécula dada en formato compacto (ids, conteos)."""
+        return float(np.dot(self.masas[ids], conteos))
+
+
+@lru_cache(maxsize=None)
+def obtener_tabla_simbolos():
+    """
+    Construye (la primera vez) y devuelve la tabla de símbolos leyendo directamente
+    el CSV de elementos (RUTA_ELEMENTOS); si falta, se lanza el error de lectura en
+    lugar de usar los datos de ejemplo de cargar_elementos.
+    """
+    with open(RUTA_ELEMENTOS, encoding='utf-8', newline='') as archivo:
+        filas = sorted(csv.DictReader(archivo), key=lambda fila: int(fila['NumeroAtomico']))
+    return TablaSimbolos([fila['Simbolo'] for fila in filas], [float(fila['MasaAtomica']) for fila in filas])
+
+
+def parsear_ecuacion(molecula_str, validar=False):
     """
     Parsea una molécula química (ej: 'H2SO4') y devuelve un diccionario de
     elementos y sus conteos (ej: {'H': 2, 'S': 1, 'O': 4}).
-    Maneja corchetes para iones o grupos funcionales como (OH)2.
-    """
-    conteo_elementos = {}
-    
-    # 1. Quitar los corchetes exteriores (útil para iones como [Fe(CN)6]4-)
-    molecula_str = molecula_str.replace('[', '(').replace(']', ')')
-    
-    # 2. Manejar grupos entre paréntesis (ej: (OH)2)
-    while '(' in molecula_str:
-        # Buscar la última aparición de un grupo entre paréntesis y su coeficiente
-        match = re.search(r'\((.*?)\)(\d*)', molecula_str)
+    Maneja grupos anidados entre paréntesis y corchetes con multiplicadores,
+    como (OH)2, [Fe(CN)6] o CH3(CH2)40CH3.
+    Con validar=True rechaza los símbolos que no están en la tabla periódica.
+
+    Recorre la cadena una sola vez con una pila de grupos abiertos, por lo que
+    el costo es lineal en el largo de la fórmula.
+    """
+    simbolos_validos = obtener_tabla_simbolos().ids if validar else None
+    return _parsear_formula(molecula_str, 0, len(molecula_str), simbolos_validos)
+
+
+def _parsear_formula(texto, inicio, fin, simbolos_validos=None):
+    """
+    Parsea la fórmula contenida en texto[inicio:fin]. Las posiciones de error
+    se informan respecto del texto completo, para poder señalarlas dentro de una ecuación.
+    Si se pasa simbolos_validos, los símbolos que no estén ahí se rechazan.
+    """
+    # Pila de grupos abiertos: cada nivel guarda (conteo_parcial, apertura, posición)
+    pila = [({}, None, -1)]
+    pos = inicio
+    formula = texto[inicio:fin]
+
+    while pos < fin:
+        match = _PATRON_TOKEN.match(texto, pos, fin)
         if not match:
-            # Esto no debería pasar si hay un '(' pero no se cierra correctamente
-            raise ValueError(f"Error de formato en paréntesis de la molécula: {molecula_str}")
-            
-        grupo_interno = match.group(1)
-        coef_grupo_str = match.group(2) if match.group(2) else '1'
-        coef_grupo = int(coef_grupo_str)
-        
-        # Reemplazar el grupo por marcadores temporales de sus elementos
-        temp_conteo = {}
-        for elem, count in _parsear_molecula_simple(grupo_interno).items():
-            temp_conteo[elem] = count * coef_grupo
-            
-        # Reemplazar el grupo original por el patrón que lo representa: {H:2}
-        # Nota: Usamos un formato interno temporal para reinsertarlo en la cadena.
-        # Esto simplifica la lógica de parseo al final.
-        reemplazo = "".join([f"§{elem}§{count}" for elem, count in temp_conteo.items()])
-        molecula_str = molecula_str.replace(match.group(0), reemplazo, 1)
-
-    # 3. Parsear la cadena resultante (con elementos simples y marcadores)
-    return _parsear_molecula_simple(molecula_str)
-
-
-def _parsear_molecula_simple(molecula_str):
-    """
-    Parsea una molécula simple (sin paréntesis) o una con marcadores temporales.
-    Ej: 'H2SO4' o 'Fe§C§6§N§6'
-    """
-    conteo_elementos = {}
-    
-    # Expresión regular:
-    # ([A-Z][a-z]?) : Captura el símbolo del elemento (una mayúscula seguida opcionalmente de una minúscula)
-    # | (§[A-Z][a-z]?§\d+) : Captura un marcador temporal de elemento (ej: §Fe§1)
-    # (\d*) : Captura el subíndice (cero o más dígitos)
-    patron = r'([A-Z][a-z]?|\§[A-Z][a-z]?§\d*)(\d*)'
-    
-    # Encontrar todos los matches en la cadena
-    matches = re.findall(patron, molecula_str)
-    
-    if not matches and molecula_str.strip():
-         # Si no hay matches, es un error de símbolo (ej: 'XyZ')
-         raise ValueError(f"Símbolo o formato de molécula inválido: {molecula_str}")
-        
-    for simbolo_match, subindice_str in matches:
-        if simbolo_match.startswith('§'):
-            # Es un marcador temporal: Ej: §H§2
-            
-            # En el flujo de parsear_ecuacion, esto no debería ocurrir.
-            # Pero por robustez, si ocurriera, asumimos que el marcador es {SÍMBOLO} {CONTEO}
-            
-            # Dividimos por '§' para obtener los componentes
-            # Ejemplo: '§H§2§O§2' se divide en ['', 'H', '2', 'O', '2']
-            partes_temp = simbolo_match.split('§')[1:]
-            
-            # Parseamos en pares (símbolo, conteo)
-            for i in range(0, len(partes_temp), 2):
-                elem_temp = partes_temp[i]
-                count_temp = int(partes_temp[i+1])
-                conteo_elementos[elem_temp] = conteo_elementos.get(elem_temp, 0) + count_temp
-            
-        else:
-            # Es un elemento simple: Ej: 'H' o 'Fe'
-            
-            simbolo = simbolo_match
-            # Si el subíndice está vacío (ej: 'H'), es 1. Sino, es el número.
+            raise ErrorParseo(
+                f"Símbolo o formato de molécula inválido en la posición {pos}: {formula}", pos)
+
+        simbolo, subindice_str, apertura, cierre, multiplicador_str, _ = match.groups()
+        conteo_actual = pila[-1][0]
+
+        if simbolo:
+            # Es un elemento simple: Ej: 'H' o 'Fe'. Sin subíndice, es 1.
+            if simbolos_validos is not None and simbolo not in simbolos_validos:
+                raise ErrorParseo(
+                    f"Elemento desconocido '{simbolo}' en la posición {pos}: {formula}", pos)
             subindice = int(subindice_str) if subindice_str else 1
-            
-            conteo_elementos[simbolo] = conteo_elementos.get(simbolo, 0) + subindice
-            
-    return conteo_elementos
+            conteo_actual[simbolo] = conteo_actual.get(simbolo, 0) + subindice
+
+        elif apertura:
+            pila.append(({}, apertura, pos))
+
+        elif cierre:
+            if len(pila) == 1 or _CIERRES[pila[-1][1]] != cierre:
+                raise ErrorParseo(
+                    f"Error de formato en paréntesis de la molécula (posición {pos}): {formula}", pos)
+
+            # Cerrar el grupo y sumarlo al nivel anterior multiplicado por su coeficiente
+            conteo_grupo, _, _ = pila.pop()
+            multiplicador = int(multiplicador_str) if multiplicador_str else 1
+            conteo_padre = pila[-1][0]
+            for elem, count in conteo_grupo.items():
+                conteo_padre[elem] = conteo_padre.get(elem, 0) + count * multiplicador
+
+        pos = match.end()
+
+    if len(pila) > 1:
+        # Quedó un grupo abierto sin cerrar
+        raise ErrorParseo(
+            f"Error de formato en paréntesis de la molécula (posición {pila[-1][2]}): {formula}",
+            pila[-1][2])
+
+    return pila[0][0]
+
+
+def normalizar_formula(molecula_str):
+    """
+    Normaliza el texto de una fórmula para usarlo como clave: convierte los
+    subíndices unicode a dígitos y elimina los espacios (ej: ' H₂ O' -> 'H2O').
+    """
+    return "".join(molecula_str.translate(SUB_TO_NORMAL).split())
+
+
+def parsear_molecula_cacheada(molecula_str):
+    """
+    Igual que parsear_ecuacion, pero memoriza el resultado en una caché LRU
+    acotada usando la fórmula normalizada como clave.
+    Devuelve un mapeo inmutable (de solo lectura) que se comparte entre llamadas;
+    si se necesita modificarlo, usar dict(resultado) para obtener una copia.
+    """
+    clave = normalizar_formula(molecula_str)
+    return _cache_parseo.obtener_o_calcular(
+        clave, lambda: MappingProxyType(parsear_ecuacion(clave)))
+
+
+def parsear_molecula_ids(molecula_str):
+    """
+    Parsea una molécula y la devuelve en formato compacto (ids, conteos): dos
+    arreglos de NumPy de solo lectura, ordenados por identificador de elemento
+    (ver TablaSimbolos). Los símbolos que no existen en la tabla periódica se rechazan
+    con ErrorParseo. Ej: 'H2O' -> ([0, 7], [2, 1]).
+    """
+    clave = normalizar_formula(molecula_str)
+    conteo = parsear_molecula_cacheada(clave)
+    ids_tabla = obtener_tabla_simbolos().ids
+    try:
+        ids = np.fromiter((ids_tabla[elem] for elem in conteo), dtype=np.int16, count=len(conteo))
+    except KeyError:
+        # Se vuelve a parsear validando, para informar la posición exacta del símbolo desconocido
+        _parsear_formula(clave, 0, len(clave), ids_tabla)
+        raise
+    conteos = np.fromiter(conteo.values(), dtype=np.int64, count=len(conteo))
+    orden = np.argsort(ids, kind='stable')
+    ids, conteos = ids[orden], conteos[orden]
+    ids.flags.writeable = False
+    conteos.flags.writeable = False
+    return ids, conteos
+
+
+def canonizar_formula(molecula_str):
+    """
+    Devuelve la fórmula canónica en notación de Hill, internada con sys.intern
+    para que especies iguales compartan un único objeto (y su hash).
+    Con carbono: C, luego H y el resto en orden alfabético; sin carbono, todo
+    en orden alfabético. Ej: 'HO2H', 'H2O2' y '(OH)2' -> 'H2O2'; 'C2H5OH' -> 'C2H6O'.
+    """
+    return formula_hill(parsear_molecula_cacheada(molecula_str))
+
+
+def formula_hill(conteo):
+    """Arma la cadena en notación de Hill (internada) a partir de un conteo de elementos."""
+    if 'C' in conteo:
+        orden = ['C'] + (['H'] if 'H' in conteo else []) + sorted(e for e in conteo if e not in ('C', 'H'))
+    else:
+        orden = sorted(conteo)
+    return sys.intern("".join(
+        elem if conteo[elem] == 1 else f"{elem}{conteo[elem]}" for elem in orden if conteo[elem]))
+
+
+def clave_especie(especie):
+    """
+    Identificador canónico de una especie (texto de fórmula o EspecieQuimica):
+    su fórmula de Hill y, si tiene carga, el sufijo '^+n' / '^-n'. El electrón es 'e'.
+    """
+    if isinstance(especie, str):
+        return canonizar_formula(especie)
+    canonica = formula_hill(especie.conteo) if especie.formula != 'e' else 'e'
+    return f"{canonica}^{especie.carga:+d}" if especie.carga else canonica
+
+
+def deduplicar_formulas(formulas):
+    """
+    Recorre un iterable de fórmulas y produce cada especie distinta una sola vez,
+    como fórmula canónica de Hill, en el orden en que aparece por primera vez.
+    Sirve para depurar conjuntos grandes antes de las etapas costosas.
+    """
+    vistas = set()
+    for formula in formulas:
+        canonica = canonizar_formula(formula)
+        if canonica not in vistas:
+            vistas.add(canonica)
+            yield canonica
+
+
+def estadisticas_cache_parseo():
+    """Devuelve aciertos, fallos, desalojos, tamaño y capacidad de la caché de parseo."""
+    return _cache_parseo.estadisticas()
+
+
+def redimensionar_cache_parseo(capacidad):
+    """Cambia la capacidad de la caché de parseo en tiempo de ejecución (0 la desactiva)."""
+    _cache_parseo.redimensionar(capacidad)
+
+
+def limpiar_cache_parseo():
+    """Vacía la caché de parseo y reinicia sus contadores."""
+    _cache_parseo.limpiar()
+
+
+def parsear_ecuacion_completa(ecuacion_str):
+    """
+    Tokeniza una ecuación completa (ej: '2H2 + O2 -> 2H2O') en una sola pasada y
+    devuelve dos listas de EspecieQuimica: (reactivos, productos).
+    Acepta las flechas →, ->, =, <=>, ⇌ y similares, coeficientes escritos por
+    el usuario, subíndices unicode y cargas ('Fe3+', 'SO4^2-', 'e-').
+    Si la entrada está mal formada lanza ErrorParseo con la posición exacta del problema.
+    """
+    # La traducción de subíndices reemplaza carácter por carácter, así que no altera las posiciones
+    texto = ecuacion_str.translate(SUB_TO_NORMAL)
+    largo = len(texto)
+    lados = [[]]
+    pos = _PATRON_ESPACIOS.match(texto).end()
+
+    while True:
+        # 1. Se espera una especie
+        match = _PATRON_ESPECIE.match(texto, pos)
+        if not match:
+            if pos >= largo:
+                raise ErrorParseo(f"Falta una especie al final de la ecuación (posición {pos})", pos)
+            raise ErrorParseo(f"Se esperaba una especie química en la posición {pos}: {texto[pos:pos + 10]!r}", pos)
+        lados[-1].append(_construir_especie(texto, match))
+        pos = match.end()
+
+        # 2. Tras la especie: separador '+', flecha o fin de la ecuación
+        if _PATRON_ESPACIOS.match(texto, pos).end() >= largo:
+            break
+        separador = _PATRON_SEPARADOR.match(texto, pos)
+        if separador:
+            pos = separador.end()
+            continue
+        flecha = _PATRON_FLECHA.match(texto, pos)
+        if flecha:
+            if len(lados) == 2:
+                raise ErrorParseo(f"La ecuación tiene más de una flecha (posición {flecha.start(1)})", flecha.start(1))
+            lados.append([])
+            pos = flecha.end()
+            continue
+        pos = _PATRON_ESPACIOS.match(texto, pos).end()
+        raise ErrorParseo(f"Carácter inesperado en la posición {pos}: {texto[pos]!r}", pos)
+
+    if len(lados) < 2:
+        raise ErrorParseo("La ecuación no tiene flecha que separe reactivos y productos", largo)
+    return lados[0], lados[1]
+
+
+def _construir_especie(texto, match):
+    """Arma la EspecieQuimica de un match de _PATRON_ESPECIE, parseando su fórmula."""
+    formula = match.group('formula')
+    inicio_formula, fin_formula = match.span('formula')
+    coeficiente = match.group('coeficiente')
+    if coeficiente is not None:
+        coeficiente = int(coeficiente)
+        if coeficiente == 0:
+            raise ErrorParseo(f"Coeficiente nulo en la posición {match.start()}", match.start())
+
+    carga = 0
+    carga_str = match.group('carga_exp') or match.group('carga_llave')
+    if carga_str:
+        signo = -1 if '-' in carga_str else 1
+        magnitud = carga_str.strip('+-')
+        carga = signo * (int(magnitud) if magnitud else 1)
+    elif match.group('carga_signo'):
+        carga = -1 if match.group('carga_signo') == '-' else 1
+        ion = _PATRON_ION_MONOATOMICO.match(formula)
+        if ion:
+            # 'Fe3+' es hierro con carga 3+, no Fe3 con carga 1+
+            formula = ion.group(1)
+            fin_formula = inicio_formula + len(formula)
+            carga *= int(ion.group(2))
+
+    if formula == 'e':
+        # El electrón no aporta átomos, solo carga
+        conteo = MappingProxyType({})
+    else:
+        conteo = _cache_parseo.obtener_o_calcular(
+            formula, lambda: MappingProxyType(_parsear_formula(texto, inicio_formula, fin_formula)))
+    return EspecieQuimica(formula, conteo, carga, coeficiente, match.start(), match.end())
+
+
+def leer_formulas_por_bloques(archivo, tamano_bloque=10000, columna=None, elementos=None,
+                              omitir_invalidas=False, encoding='utf-8'):
+    """
+    Lee un archivo de fórmulas (texto plano, una por línea, o CSV) en bloques y
+    por cada bloque produce una tupla (ids_filas, matriz):
+    - ids_filas: arreglo int64 con el número de línea (desde 1) de cada fórmula.
+    - matriz: arreglo int32 de forma (filas, elementos) con los conteos; la columna j
+      corresponde a elementos[j] (por defecto, la tabla de obtener_tabla_simbolos(), por número atómico).
+
+    'archivo' puede ser una ruta o un objeto de archivo ya abierto. Si 'columna' es
+    None se lee texto plano; si es un entero o el nombre de una columna se lee como CSV
+    (con encabezado cuando es un nombre). Las líneas vacías y las que empiezan con '#'
+    se saltan. Con omitir_invalidas=True las fórmulas mal escritas se descartan en vez
+    de lanzar ErrorParseo. Solo hay un bloque en memoria a la vez.
+    """
+    if tamano_bloque <= 0:
+        raise ValueError(f"El tamaño de bloque debe ser positivo: {tamano_bloque}")
+    if elementos is None:
+        indice_elemento = obtener_tabla_simbolos().ids
+    else:
+        indice_elemento = {simbolo: j for j, simbolo in enumerate(elementos)}
+
+    if isinstance(archivo, str):
+        with open(archivo, newline='', encoding=encoding) as manejador:
+            yield from _leer_bloques(manejador, tamano_bloque, columna, indice_elemento, omitir_invalidas)
+    else:
+        yield from _leer_bloques(archivo, tamano_bloque, columna, indice_elemento, omitir_invalidas)
+
+
+def _leer_bloques(manejador, tamano_bloque, columna, indice_elemento, omitir_invalidas):
+    """Generador interno de leer_formulas_por_bloques sobre un archivo ya abierto."""
+    num_elementos = len(indice_elemento)
+    ids = np.empty(tamano_bloque, dtype=np.int64)
+    matriz = np.zeros((tamano_bloque, num_elementos), dtype=np.int32)
+    fila = 0
+
+    for num_linea, formula in _iterar_formulas(manejador, columna):
+        try:
+            conteo = parsear_molecula_cacheada(formula)
+            for elem, count in conteo.items():
+                if elem not in indice_elemento:
+                    raise ErrorParseo(f"Elemento desconocido '{elem}' en la fórmula: {formula}", 0)
+                matriz[fila, indice_elemento[elem]] = count
+        except ErrorParseo as e:
+            if omitir_invalidas:
+                matriz[fila] = 0
+                continue
+            raise ErrorParseo(f"Línea {num_linea}: {e}", e.posicion) from e
+
+        ids[fila] = num_linea
+        fila += 1
+        if fila == tamano_bloque:
+            yield ids, matriz
+            ids = np.empty(tamano_bloque, dtype=np.int64)
+            matriz = np.zeros((tamano_bloque, num_elementos), dtype=np.int32)
+            fila = 0
+
+    if fila:
+        yield ids[:fila], matriz[:fila]
+
+
+def _iterar_formulas(manejador, columna):
+    """Produce (número de línea, fórmula) saltando líneas vacías y comentarios."""
+    if columna is None:
+        for num_linea, linea in enumerate(manejador, start=1):
+            formula = linea.strip()
+            if formula and not formula.startswith('#'):
+                yield num_linea, formula
+        return
+
+    lector = csv.reader(manejador)
+    indice_columna = columna
+    if isinstance(columna, str):
+        encabezado = next(lector, [])
+        if columna not in encabezado:
+            raise ValueError(f"La columna '{columna}' no está en el encabezado: {encabezado}")
+        indice_columna = encabezado.index(columna)
+
+    for registro in lector:
+        if indice_columna >= len(registro):
+            continue
+        formula = registro[indice_columna].strip()
+        if formula and not formula.startswith('#'):
+            yield lector.line_num, formula
 
-# Ejemplo: parsear_ecuacion("Fe(OH)3") -> {'Fe': 1, 'O': 3, 'H': 3}
\ No newline at end of file
+# Ejemplo: parsear_ecuacion("Fe(OH)3") -> {'Fe': 1, 'O': 3, 'H': 3}
@@ -0,0 +1,99 @@
+from fractions import Fraction
+
+
+def minimizar_lineal(objetivo, filas, lados):
+    """
+    Programa lineal exacto: minimiza objetivo·s sujeto a filas·s >= lados y s >= 0.
+    Simplex de dos fases con la regla de Bland (no cicla) y aritmética en Fraction,
+    pensado para los sistemas chicos del balanceo (pocas restricciones).
+    Devuelve (valor, s), con s una lista de Fraction, o None si no es factible.
+    Lanza ValueError si el objetivo no está acotado.
+    """
+    num_variables, num_filas = len(objetivo), len(filas)
+    necesitan_artificial = [lado > 0 for lado in lados]
+    num_artificiales = sum(necesitan_artificial)
+    total = num_variables + num_filas + num_artificiales
+
+    # Forma estándar: filas·s - holgura = lado; si lado <= 0 la fila se niega y su
+    # holgura entra a la base, si no se agrega una variable artificial
+    tabla, base = [], []
+    artificial = num_variables + num_filas
+    for i, (fila, lado) in enumerate(zip(filas, lados)):
+        renglon = [Fraction(valor) for valor in fila] + [Fraction(0)] * (total - num_variables) + [Fraction(lado)]
+        renglon[num_variables + i] = Fraction(-1)
+        if necesitan_artificial[i]:
+            renglon[artificial] = Fraction(1)
+            base.append(artificial)
+            artificial += 1
+        else:
+            renglon = [-valor for valor in renglon]
+            base.append(num_variables + i)
+        tabla.append(renglon)
+
+    if num_artificiales:
+        # Fase 1: minimizar la suma de las artificiales
+        costos = [0] * (num_variables + num_filas) + [1] * num_artificiales
+        _simplex(tabla, base, costos, range(total))
+        if any(renglon[-1] for renglon, columna in zip(tabla, base) if columna >= num_variables + num_filas):
+            return None
+        # Las artificiales que quedaron en la base (en cero) se sacan o su fila es redundante
+        for i in reversed(range(len(tabla))):
+            if base[i] >= num_variables + num_filas:
+                entrante = next((j for j in range(num_variables + num_filas) if tabla[i][j]), None)
+                if entrante is None:
+                    del tabla[i], base[i]
+                else:
+                    _pivotear(tabla, base, i, entrante)
+        tabla = [renglon[:num_variables + num_filas] + renglon[-1:] for renglon in tabla]
+
+    # Fase 2: el objetivo real
+    costos = list(objetivo) + [0] * num_filas
+    if not _simplex(tabla, base, costos, range(num_variables + num_filas)):
+        raise ValueError("El programa lineal no está acotado")
+    solucion = [Fraction(0)] * num_variables
+    for renglon, columna in zip(tabla, base):
+        if columna < num_variables:
+            solucion[columna] = renglon[-1]
+    return sum(c * s for c, s in zip(objetivo, solucion)), solucion
+
+
+def _simplex(tabla, base, costos, columnas):
+    """
+    Itera el simplex sobre la tabla (en forma canónica para 'base') con la regla de
+    Bland. Devuelve False si el objetivo no está acotado y True al llegar al óptimo.
+    """
+    while True:
+        en_base = set(base)
+        entrante = None
+        for j in columnas:
+            if j in en_base:
+                continue
+            reducido = costos[j] - sum(costos[b] * renglon[j] for renglon, b in zip(tabla, base) if renglon[j])
+            if reducido < 0:
+                entrante = j
+                break
+        if entrante is None:
+            return True
+
+        saliente, mejor_razon = None, None
+        for i, renglon in enumerate(tabla):
+            if renglon[entrante] > 0:
+                razon = renglon[-1] / renglon[entrante]
+                if (saliente is None or razon < mejor_razon
+                        or (razon == mejor_razon and base[i] < base[saliente])):
+                    saliente, mejor_razon = i, razon
+        if saliente is None:
+            return False
+        _pivotear(tabla, base, saliente, entrante)
+
+
+def _pivotear(tabla, base, fila, columna):
+    """Pivotea la tabla en (fila, columna): la columna pasa a ser la variable básica de la fila."""
+    pivote = tabla[fila][columna]
+    renglon_pivote = [valor / pivote for valor in tabla[fila]]
+    tabla[fila] = renglon_pivote
+    for i, renglon in enumerate(tabla):
+        factor = renglon[columna]
+        if i != fila and factor:
+            tabla[i] = [valor - factor * p for valor, p in zip(renglon, renglon_pivote)]
+    base[fila] = columna
@@ -0,0 +1,174 @@
+import numpy as np
+from modules.balanceo import ELEMENTO_CARGA, BalanceadorEcuacion, calcular_espacio_nulo, conteo_con_carga
+from modules.parser import clave_especie, parsear_ecuacion_completa, parsear_molecula_cacheada
+
+# Fila extra de la matriz de composición para el balance de carga (la misma que usa el balanceador)
+FILA_CARGA = ELEMENTO_CARGA
+
+
+class RedReacciones:
+    """
+    Red de reacciones sobre un conjunto compartido de especies.
+
+    Guarda una única matriz estequiométrica dispersa N (especies x reacciones), con
+    los coeficientes de los productos positivos y los de los reactivos negativos.
+    Las especies se identifican por su fórmula canónica (ver clave_especie), así que
+    'H2O' escrita en dos reacciones es la misma fila. Sobre N se calculan de una vez:
+    - el balance de todas las reacciones (un solo producto matricial E·N, ver residuos),
+    - las leyes de conservación (espacio nulo izquierdo de N) y
+    - el rango (cantidad de reacciones independientes).
+    El análisis se guarda y se recalcula solo cuando se agregan reacciones.
+    """
+    def __init__(self):
+        self.especies = []      # claves canónicas, en orden de aparición
+        self.reacciones = []    # texto de cada reacción, tal como se agregó
+        self._indices = {}
+        self._conteos = []
+        self._cargas = []
+        self._filas, self._columnas, self._valores = [], [], []
+        self._analisis = None
+
+    def __len__(self):
+        return len(self.reacciones)
+
+    def agregar_especie(self, especie):
+        """
+        Agrega una especie (texto de fórmula o EspecieQuimica) si no estaba y devuelve
+        su índice de fila. Sirve para fijar de antemano el conjunto de especies.
+        """
+        clave = clave_especie(especie)
+        indice = self._indices.get(clave)
+        if indice is None:
+            indice = self._indices[clave] = len(self.especies)
+            self.especies.append(clave)
+            if isinstance(especie, str):
+                self._conteos.append(parsear_molecula_cacheada(especie))
+                self._cargas.append(0)
+            else:
+                self._conteos.append(especie.conteo)
+                self._cargas.append(especie.carga)
+            self._analisis = None
+        return indice
+
+    def agregar_reaccion(self, ecuacion, balancear=False):
+        """
+        Agrega una reacción escrita como texto (ej: '2H2 + O2 -> 2H2O') y devuelve su
+        índice de columna. Se usan los coeficientes escritos (1 si se omiten); con
+        balancear=True se calculan con BalanceadorEcuacion (solución mínima) y se lanza
+        ValueError si la reacción no se puede balancear.
+        """
+        reactivos, productos = parsear_ecuacion_completa(ecuacion)
+        especies = reactivos + productos
+        if balancear:
+            balanceador = BalanceadorEcuacion([conteo_con_carga(e) for e in reactivos],
+                                              [conteo_con_carga(e) for e in productos])
+            coeficientes = balanceador.resolver(modo='minimo')
+            if not coeficientes:
+                motivo = balanceador.motivo_sin_solucion
+                raise ValueError(f"No se pudo balancear '{ecuacion}'"
+                                 + (f": {motivo['mensaje']}" if motivo else ""))
+        else:
+            coeficientes = [e.coeficiente or 1 for e in especies]
+
+        # Una especie repetida dentro de la reacción suma sus coeficientes
+        columna = {}
+        for k, (especie, coeficiente) in enumerate(zip(especies, coeficientes)):
+            fila = self.agregar_especie(especie)
+            columna[fila] = columna.get(fila, 0) + (coeficiente if k >= len(reactivos) else -coeficiente)
+
+        indice = len(self.reacciones)
+        for fila, valor in columna.items():
+            if valor:
+                self._filas.append(fila)
+                self._columnas.append(indice)
+                self._valores.append(valor)
+        self.reacciones.append(ecuacion)
+        self._analisis = None
+        return indice
+
+    def agregar_reacciones(self, ecuaciones, balancear=False):
+        """Agrega varias reacciones y devuelve sus índices (ver agregar_reaccion)."""
+        return [self.agregar_reaccion(ecuacion, balancear) for ecuacion in ecuaciones]
+
+    def matriz_estequiometrica(self, formato='coo'):
+        """
+        Devuelve la matriz N (especies x reacciones), con el mismo formato que
+        BalanceadorEcuacion.construir_matriz_dispersa:
+        - 'coo': ((filas, columnas, valores), forma)
+        - 'csr': ((indptr, columnas, valores), forma), con las entradas ordenadas por fila
+        - 'densa': arreglo de NumPy int64.
+        """
+        forma = (len(self.especies), len(self.reacciones))
+        filas = np.array(self._filas, dtype=np.intp)
+        columnas = np.array(self._columnas, dtype=np.intp)
+        valores = np.array(self._valores, dtype=np.int64)
+        if formato == 'coo':
+            return (filas, columnas, valores), forma
+        if formato == 'csr':
+            orden = np.lexsort((columnas, filas))
+            indptr = np.zeros(forma[0] + 1, dtype=np.intp)
+            np.cumsum(np.bincount(filas, minlength=forma[0]), out=indptr[1:])
+            return (indptr, columnas[orden], valores[orden]), forma
+        if formato == 'densa':
+            densa = np.zeros(forma, dtype=np.int64)
+            densa[filas, columnas] = valores
+            return densa
+        raise ValueError(f"Formato de matriz desconocido: {formato}")
+
+    def matriz_composicion(self):
+        """
+        Devuelve (E, filas): E es la matriz elementos x especies con los conteos y
+        filas la lista de elementos; si alguna especie tiene carga se agrega al final
+        la fila FILA_CARGA.
+        """
+        elementos = sorted({elemento for conteo in self._conteos for elemento in conteo})
+        filas = elementos + ([FILA_CARGA] if any(self._cargas) else [])
+        posicion = {elemento: i for i, elemento in enumerate(elementos)}
+        composicion = np.zeros((len(filas), len(self.especies)), dtype=np.int64)
+        for j, conteo in enumerate(self._conteos):
+            for elemento, cantidad in conteo.items():
+                composicion[posicion[elemento], j] = cantidad
+        if any(self._cargas):
+            composicion[-1] = self._cargas
+        return composicion, filas
+
+    def residuos(self):
+        """
+        Calcula E·N para todas las reacciones a la vez: la columna r es lo que sobra
+        (positivo) o falta (negativo) de cada elemento, y de la carga, en la reacción r.
+        Devuelve (residuos, filas) con las filas de matriz_composicion.
+        """
+        composicion, filas = self.matriz_composicion()
+        (especies, reacciones, valores), _ = self.matriz_estequiometrica()
+        residuos = np.zeros((len(filas), len(self.reacciones)), dtype=np.int64)
+        # Cada entrada de N aporta su columna de E escalada a la reacción correspondiente
+        np.add.at(residuos.T, reacciones, (composicion[:, especies] * valores).T)
+        return residuos, filas
+
+    def reacciones_desbalanceadas(self):
+        """Índices de las reacciones cuyo balance de elementos o de carga no cierra."""
+        residuos, _ = self.residuos()
+        return np.flatnonzero(residuos.any(axis=0)).tolist()
+
+    def leyes_de_conservacion(self, motor='auto'):
+        """
+        Base entera del espacio nulo izquierdo de N: vectores l (uno por ley, sobre
+        las especies) con l·N = 0, es decir, combinaciones de especies que ninguna
+        reacción de la red cambia.
+        """
+        return self._analizar(motor)[0]
+
+    def rango(self, motor='auto'):
+        """Cantidad de reacciones linealmente independientes (rango de N)."""
+        return self._analizar(motor)[1]
+
+    def _analizar(self, motor):
+        """Calcula (leyes_de_conservacion, rango) una sola vez por estado de la red."""
+        if self._analisis is None or self._analisis[2] != motor:
+            num_especies = len(self.especies)
+            if not self.reacciones:
+                leyes = [[1 if j == i else 0 for j in range(num_especies)] for i in range(num_especies)]
+            else:
+                leyes, _, _ = calcular_espacio_nulo(self.matriz_estequiometrica('densa').T, motor)
+            self._analisis = (leyes, num_especies - len(leyes), motor)
+        return self._analisis[0], self._analisis[1]
@@ -0,0 +1,397 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from modules import instrumentacion
+from modules.balanceo import balancear_texto
+from modules.cache_balanceo import CacheBalanceo
+from modules.parser import obtener_tabla_simbolos
+from modules.utils import entero_positivo
+
+# Ecuaciones con las que se precalientan el parser, las cachés y NumPy al iniciar
+ECUACIONES_PRECALENTAMIENTO = [
+    'H2 + O2 -> H2O',
+    'C3H8 + O2 -> CO2 + H2O',
+    'KMnO4 + HCl -> KCl + MnCl2 + H2O + Cl2',
+    'Fe2(SO4)3 + KOH -> K2SO4 + Fe(OH)3',
+    'Ca3(PO4)2 + SiO2 + C -> CaSiO3 + P4 + CO',
+    'MnO4^- + Fe^2+ + H^+ -> Mn^2+ + Fe^3+ + H2O',
+]
+# Cantidad de latencias que se guardan para los percentiles de /salud
+VENTANA_LATENCIAS = 10000
+# Límites de cada pedido HTTP
+MAX_ECUACIONES_POR_PEDIDO = 1000
+MAX_BYTES_PEDIDO = 1 << 20
+
+# CacheBalanceo de cada proceso que balancea (la crea _preparar_proceso)
+_cache_proceso = None
+
+
+class ServidorBalanceo(ThreadingHTTPServer):
+    """Servidor HTTP con un hilo por conexión y una cola de conexiones acorde a muchos clientes."""
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class ServicioBalanceo:
+    """
+    Cola de balanceo con micro-lotes, independiente de HTTP.
+
+    Las ecuaciones que llegan de pedidos concurrentes se juntan en una cola acotada;
+    un hilo despachador arma lotes de hasta tamano_lote ecuaciones (esperando como
+    mucho espera_lote segundos a que se completen) y los reparte entre 'procesos'
+    procesos (1 = en el propio hilo despachador). Como solo hay unos pocos lotes en
+    vuelo a la vez, cuando los procesos no dan abasto la cola se llena y enviar
+    rechaza las ecuaciones nuevas en lugar de acumular trabajo sin límite.
+    Si el pool de procesos se rompe (un proceso muere), los lotes en vuelo y los
+    pendientes fallan con ese error, el servicio queda detenido y estado() lo informa.
+    Con instrumentar=True se miden las etapas de cada balanceo (ver modules.instrumentacion):
+    cada resultado lleva sus 'registros' y estado() incluye el resumen por etapa.
+    """
+    def __init__(self, procesos=1, tamano_lote=32, espera_lote=0.002, capacidad_cola=1024,
+                 ruta_cache=None, max_nodos=200000, tiempo_max=2.0, instrumentar=False):
+        if tamano_lote <= 0:
+            raise ValueError(f"El tamaño de lote debe ser positivo: {tamano_lote}")
+        if capacidad_cola < tamano_lote:
+            raise ValueError(f"La capacidad de la cola ({capacidad_cola}) debe ser al menos "
+                             f"el tamaño de lote ({tamano_lote})")
+        self.procesos = procesos or os.cpu_count() or 1
+        self.tamano_lote = tamano_lote
+        self.espera_lote = espera_lote
+        self.capacidad_cola = capacidad_cola
+        self.ruta_cache = ruta_cache
+        self.max_nodos = max_nodos
+        self.tiempo_max = tiempo_max
+        self.instrumentar = instrumentar
+        self.procesadas = 0
+        self.rechazadas = 0
+        self._cola = deque()    # (ecuacion, futuro, llegada)
+        self._condicion = threading.Condition()
+        self._lotes_libres = threading.Semaphore(2 * self.procesos)
+        self._latencias = deque(maxlen=VENTANA_LATENCIAS)
+        self._ejecutor = None
+        self._despachador = None
+        self._detenido = False
+        self._error = None
+
+    def iniciar(self):
+        """
+        Carga la tabla de elementos, precalienta las cachés (en este proceso y en cada
+        proceso del pool) y arranca el hilo despachador. Así el primer pedido no paga
+        la carga de datos ni la importación de NumPy.
+        """
+        _preparar_proceso(self.ruta_cache, self.instrumentar)
+        if self.procesos > 1:
+            self._ejecutor = ProcessPoolExecutor(max_workers=self.procesos, initializer=_preparar_proceso,
+                                                 initargs=(self.ruta_cache, self.instrumentar))
+            # Una tarea vacía por proceso obliga a crearlos (y precalentarlos) ahora
+            for futuro in [self._ejecutor.submit(os.getpid) for _ in range(self.procesos)]:
+                futuro.result()
+        self._despachador = threading.Thread(target=self._despachar, name='despachador-balanceo', daemon=True)
+        self._despachador.start()
+        return self
+
+    def detener(self):
+        """Termina los lotes pendientes y libera los procesos."""
+        with self._condicion:
+            self._detenido = True
+            self._condicion.notify_all()
+        if self._despachador is not None:
+            self._despachador.join()
+        if self._ejecutor is not None:
+            self._ejecutor.shutdown()
+
+    def enviar(self, ecuaciones):
+        """
+        Encola las ecuaciones (textos) y devuelve un Future por ecuación, que se
+        resuelve con el diccionario de balancear_texto más 'tiempo' (segundos de
+        cálculo). Se admiten todas o ninguna: devuelve None si no entran en la cola.
+        """
+        llegada = time.perf_counter()
+        futuros = [Future() for _ in ecuaciones]
+        with self._condicion:
+            if self._detenido:
+                raise ValueError(f"El servicio está detenido: {self._error}" if self._error
+                                 else "El servicio está detenido")
+            if len(self._cola) + len(ecuaciones) > self.capacidad_cola:
+                self.rechazadas += len(ecuaciones)
+                return None
+            self._cola.extend((ecuacion, futuro, llegada) for ecuacion, futuro in zip(ecuaciones, futuros))
+            self._condicion.notify()
+        return futuros
+
+    def estado(self):
+        """
+        Estado para el chequeo de salud: 'ok', 'detenido' o 'error' (con el error que
+        detuvo el servicio), profundidad de la cola, contadores y percentiles de latencia
+        (desde que se encola hasta que se resuelve, en segundos, sobre las últimas
+        VENTANA_LATENCIAS ecuaciones). Con instrumentación, 'etapas' tiene el resumen
+        por etapa de todos los procesos (ver instrumentacion.resumen).
+        """
+        with self._condicion:
+            cola = len(self._cola)
+            latencias = np.array(self._latencias)
+            procesadas, rechazadas = self.procesadas, self.rechazadas
+            detenido, error = self._detenido, self._error
+        if latencias.size:
+            latencia = {'p50': float(np.percentile(latencias, 50)), 'p95': float(np.percentile(latencias, 95)),
+                        'p99': float(np.percentile(latencias, 99)), 'max': float(latencias.max())}
+        else:
+            latencia = {'p50': None, 'p95': None, 'p99': None, 'max': None}
+        estado = {'estado': 'error' if error else 'detenido' if detenido else 'ok', 'cola': cola,
+                  'capacidad_cola': self.capacidad_cola, 'procesos': self.procesos,
+                  'procesadas': procesadas, 'rechazadas': rechazadas, 'latencia': latencia}
+        if error:
+            estado['error'] = f"{type(error).__name__}: {error}"
+        if self.instrumentar:
+            estado['etapas'] = instrumentacion.resumen()
+        return estado
+
+    def _despachar(self):
+        """Bucle del hilo despachador: arma lotes de la cola y los manda a balancear."""
+        while True:
+            with self._condicion:
+                while not self._cola and not self._detenido:
+                    self._condicion.wait()
+                if not self._cola:
+                    return
+                # Se espera un poco a que lleguen más ecuaciones para completar el lote
+                limite = time.perf_counter() + self.espera_lote
+                while len(self._cola) < self.tamano_lote and not self._detenido:
+                    restante = limite - time.perf_counter()
+                    if restante <= 0:
+                        break
+                    self._condicion.wait(restante)
+                lote = [self._cola.popleft() for _ in range(min(self.tamano_lote, len(self._cola)))]
+
+            self._lotes_libres.acquire()
+            ecuaciones = [ecuacion for ecuacion, _, _ in lote]
+            if self._ejecutor is None:
+                resultado = Future()
+                try:
+                    resultado.set_result(_balancear_lote(ecuaciones, self.max_nodos, self.tiempo_max))
+                except Exception as e:
+                    resultado.set_exception(e)
+                self._entregar(lote, resultado)
+            else:
+                try:
+                    resultado = self._ejecutor.submit(_balancear_lote, ecuaciones, self.max_nodos, self.tiempo_max)
+                except Exception as e:
+                    # Pool roto (BrokenProcessPool) o cerrado: no se puede seguir despachando
+                    resultado = Future()
+                    resultado.set_exception(e)
+                    self._entregar(lote, resultado)
+                    self._fallar(e)
+                    return
+                resultado.add_done_callback(lambda resultado, lote=lote: self._entregar(lote, resultado))
+
+    def _entregar(self, lote, resultado):
+        """Resuelve los futuros de un lote terminado y registra sus latencias."""
+        self._lotes_libres.release()
+        error = resultado.exception()
+        resultados = resultado.result() if error is None else [None] * len(lote)
+        fin = time.perf_counter()
+        if self.instrumentar and self._ejecutor is not None and error is None:
+            # Lo medido en los procesos del pool se suma al resumen de este proceso
+            for resultado_ecuacion in resultados:
+                instrumentacion.incorporar(resultado_ecuacion.get('registros', ()))
+        with self._condicion:
+            self.procesadas += len(lote)
+            self._latencias.extend(fin - llegada for _, _, llegada in lote)
+        for (_, futuro, _), resultado_ecuacion in zip(lote, resultados):
+            if error is None:
+                futuro.set_result(resultado_ecuacion)
+            else:
+                futuro.set_exception(error)
+        if isinstance(error, BrokenProcessPool):
+            self._fallar(error)
+
+    def _fallar(self, error):
+        """Detiene el servicio por un error del pool y falla las ecuaciones que quedaban en la cola."""
+        with self._condicion:
+            if self._error is None:
+                self._error = error
+            self._detenido = True
+            pendientes = list(self._cola)
+            self._cola.clear()
+            self._condicion.notify_all()
+        for _, futuro, _ in pendientes:
+            futuro.set_exception(error)
+
+
+def _preparar_proceso(ruta_cache=None, instrumentar=False):
+    """
+    Carga la tabla de elementos, crea la caché del proceso y la precalienta. La
+    instrumentación se activa después, para que el precalentamiento no cuente.
+    """
+    global _cache_proceso
+    obtener_tabla_simbolos()
+    _cache_proceso = CacheBalanceo(ruta_sqlite=ruta_cache)
+    for ecuacion in ECUACIONES_PRECALENTAMIENTO:
+        balancear_texto(ecuacion, cache=_cache_proceso)
+    if instrumentar:
+        instrumentacion.activar()
+
+
+def _balancear_lote(ecuaciones, max_nodos, tiempo_max):
+    """Balancea un lote de ecuaciones con la caché del proceso."""
+    resultados = []
+    for ecuacion in ecuaciones:
+        inicio = time.perf_counter()
+        resultado = balancear_texto(ecuacion, max_nodos, tiempo_max, cache=_cache_proceso)
+        resultado['tiempo'] = time.perf_counter() - inicio
+        resultados.append(resultado)
+    return resultados
+
+
+class ManejadorBalanceo(BaseHTTPRequestHandler):
+    """
+    Pedidos HTTP del servicio (JSON en ambos sentidos):
+    - POST /balancear con {"ecuacion": "..."} devuelve un resultado, y con
+      {"ecuaciones": ["...", ...]} devuelve {"resultados": [...]} en el mismo orden.
+    - GET /salud devuelve ServicioBalanceo.estado(), con código 503 si no está 'ok'.
+    Si la cola está llena responde 503 (con Retry-After) para que el cliente reintente;
+    si el servicio se detuvo (por ejemplo, porque se rompió el pool de procesos), 503 sin él.
+    """
+    protocol_version = 'HTTP/1.1'
+    # Segundos que un pedido espera sus resultados antes de responder 504
+    tiempo_espera = 30.0
+
+    def do_GET(self):
+        if self.path != '/salud':
+            return self._responder(404, {'error': f"Ruta desconocida: {self.path}"})
+        estado = self.server.servicio.estado()
+        self._responder(200 if estado['estado'] == 'ok' else 503, estado)
+
+    def do_POST(self):
+        if self.path != '/balancear':
+            return self._responder(404, {'error': f"Ruta desconocida: {self.path}"})
+        try:
+            ecuaciones, individual = self._leer_pedido()
+        except ValueError as e:
+            return self._responder(400, {'error': str(e)})
+
+        try:
+            futuros = self.server.servicio.enviar(ecuaciones)
+        except ValueError as e:
+            return self._responder(503, {'error': str(e)})
+        if futuros is None:
+            return self._responder(503, {'error': "La cola de balanceo está llena"}, {'Retry-After': '1'})
+        limite = time.perf_counter() + self.tiempo_espera
+        try:
+            resultados = [futuro.result(max(0.0, limite - time.perf_counter())) for futuro in futuros]
+        except TimeoutError:
+            return self._responder(504, {'error': "Se agotó el tiempo de espera del balanceo"})
+        except Exception as e:
+            return self._responder(500, {'error': str(e)})
+        self._responder(200, resultados[0] if individual else {'resultados': resultados})
+
+    def _leer_pedido(self):
+        """Lee el cuerpo JSON y devuelve (ecuaciones, individual); lanza ValueError si no es válido."""
+        try:
+            longitud = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            longitud = -1
+        if longitud < 0 or longitud > MAX_BYTES_PEDIDO:
+            # El cuerpo no se lee (rfile.read(-1) leería sin límite hasta que el cliente
+            # cierre), así que la conexión no se puede reutilizar
+            self.close_connection = True
+        if longitud < 0:
+            raise ValueError("Content-Length inválido")
+        if longitud > MAX_BYTES_PEDIDO:
+            raise ValueError(f"El pedido supera los {MAX_BYTES_PEDIDO} bytes")
+        try:
+            cuerpo = json.loads(self.rfile.read(longitud) or b'null')
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ValueError(f"JSON inválido: {e}") from e
+        if isinstance(cuerpo, dict) and isinstance(cuerpo.get('ecuacion'), str):
+            return [cuerpo['ecuacion']], True
+        if isinstance(cuerpo, dict) and isinstance(cuerpo.get('ecuaciones'), list):
+            ecuaciones = cuerpo['ecuaciones']
+            if not all(isinstance(ecuacion, str) for ecuacion in ecuaciones):
+                raise ValueError("'ecuaciones' debe ser una lista de textos")
+            if len(ecuaciones) > MAX_ECUACIONES_POR_PEDIDO:
+                raise ValueError(f"Como máximo {MAX_ECUACIONES_POR_PEDIDO} ecuaciones por pedido")
+            return ecuaciones, False
+        raise ValueError("Se esperaba {\"ecuacion\": \"...\"} o {\"ecuaciones\": [\"...\", ...]}")
+
+    def _responder(self, codigo, datos, encabezados=None):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        for nombre, valor in (encabezados or {}).items():
+            self.send_header(nombre, valor)
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        if self.server.registrar_pedidos:
+            super().log_message(formato, *args)
+
+
+def crear_servidor(servicio, host='127.0.0.1', puerto=8000, registrar_pedidos=False):
+    """
+    Crea (sin arrancarlo) el servidor HTTP de un ServicioBalanceo ya iniciado; cada
+    conexión se atiende en su propio hilo. Se arranca con serve_forever().
+    """
+    servidor = ServidorBalanceo((host, puerto), ManejadorBalanceo)
+    servidor.servicio = servicio
+    servidor.registrar_pedidos = registrar_pedidos
+    return servidor
+
+
+def main(argumentos=None):
+    """
+    Servicio HTTP local de balanceo:
+        python -m modules.servidor [--host H] [--puerto P] [opciones]
+    Ver ManejadorBalanceo para las rutas.
+    """
+    lector = argparse.ArgumentParser(
+        prog='python -m modules.servidor',
+        description="Servicio HTTP/JSON local para balancear ecuaciones químicas.")
+    lector.add_argument('--host', default='127.0.0.1', help="dirección donde escuchar (por defecto 127.0.0.1)")
+    lector.add_argument('--puerto', type=int, default=8000, help="puerto donde escuchar (por defecto 8000)")
+    lector.add_argument('-p', '--procesos', type=entero_positivo, default=None,
+                        help="cantidad de procesos (por defecto, los núcleos disponibles; 1 = sin pool)")
+    lector.add_argument('-b', '--tamano-lote', type=entero_positivo, default=32,
+                        help="máximo de ecuaciones por micro-lote (por defecto 32)")
+    lector.add_argument('--espera-lote', type=float, default=2.0,
+                        help="milisegundos que se espera a completar un micro-lote (por defecto 2)")
+    lector.add_argument('--capacidad-cola', type=entero_positivo, default=1024,
+                        help="ecuaciones pendientes admitidas antes de responder 503 (por defecto 1024)")
+    lector.add_argument('--cache', metavar='RUTA', default=None,
+                        help="archivo SQLite de caché compartida entre procesos y ejecuciones")
+    lector.add_argument('-v', '--verboso', action='store_true', help="registrar cada pedido en stderr")
+    lector.add_argument('--instrumentar', action='store_true',
+                        help="medir el tiempo de cada etapa del balanceo y mostrarlo en /salud")
+    opciones = lector.parse_args(argumentos)
+
+    servicio = ServicioBalanceo(procesos=opciones.procesos, tamano_lote=opciones.tamano_lote,
+                                espera_lote=opciones.espera_lote / 1000, capacidad_cola=opciones.capacidad_cola,
+                                ruta_cache=opciones.cache, instrumentar=opciones.instrumentar).iniciar()
+    servidor = crear_servidor(servicio, opciones.host, opciones.puerto, opciones.verboso)
+    print(f"Escuchando en http://{opciones.host}:{servidor.server_address[1]}", file=sys.stderr)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servicio.detener()
+    return 0
+
+
+if __name__ == '__main__':
+    # Se usa el módulo importado (no __main__) para que el pool de procesos encuentre sus funciones
+    from modules.servidor import main as _main
+    sys.exit(_main())
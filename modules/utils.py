@@ -1,5 +1,8 @@
+import argparse
 import os
+import threading
 import pandas as pd
+from collections import OrderedDict
 from fractions import Fraction
 from math import gcd
 from functools import reduce
@@ -8,6 +11,10 @@ from functools import reduce
 # CONSTANTES Y DATOS
 # =============================================================================
 
+# Datos de los elementos, relativos al paquete (no al directorio de trabajo)
+RUTA_ELEMENTOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "data", "elementos_completo.csv")
+
 COLORES_GRUPOS = {
     "Metal Alcalino": "#EF5350",       # Rojo suave
     "Metal Alcalinotérreo": "#FFA726", # Naranja
@@ -77,8 +84,8 @@ def cargar_elementos():
     retorna un DataFrame completo con datos dummy (seguro y robusto).
     """
     
-    # 1. Definir rutas de intento (se simplifica la lógica de path)
-    ruta_csv = os.path.join("data", "elementos_completo.csv")
+    # 1. Ruta del CSV junto al paquete, para que funcione desde cualquier directorio
+    ruta_csv = RUTA_ELEMENTOS
 
     df_elementos = None
     try:
@@ -107,6 +114,17 @@ def cargar_elementos():
 
 # Resto de funciones
 
+def entero_positivo(texto):
+    """Tipo para argparse: un entero mayor que cero (si no, error de uso con salida 2)."""
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"se esperaba un entero: {texto!r}") from None
+    if valor <= 0:
+        raise argparse.ArgumentTypeError(f"debe ser positivo: {valor}")
+    return valor
+
+
 def minimizar_coeficientes(coeficientes):
     """
     Minimiza los coeficientes de una lista de fracciones/enteros a la 
@@ -116,8 +134,8 @@ def minimizar_coeficientes(coeficientes):
         return []
 
     # 1. Convertir a fracciones (asegura que todos los coeficientes tengan numerador/denominador)
-    # Se añade manejo de casos donde el input podría ser un string (aunque la lógica asume numéricos)
-    fracciones = [Fraction(c) if isinstance(c, (int, float, str)) and str(c).replace('.', '', 1).isdigit() else Fraction(0) for c in coeficientes]
+    # Se aceptan enteros, Fraction, floats y strings numéricos; lo demás cuenta como 0
+    fracciones = [_a_fraccion(c) for c in coeficientes]
     
     # Si todos los coeficientes son cero, la forma mínima sigue siendo [0, 0, ...]
     if all(f.numerator == 0 for f in fracciones):
@@ -157,4 +175,102 @@ def minimizar_coeficientes(coeficientes):
     coeficientes_minimos = [n // mcd_total for n in enteros_numerador]
     
     # 6. Retorna la lista de enteros
-    return coeficientes_minimos
\ No newline at end of file
+    return coeficientes_minimos
+
+
+def _a_fraccion(valor):
+    """Convierte un coeficiente (int, Fraction, float o str numérico) a Fraction; si no se puede, 0."""
+    try:
+        return Fraction(valor)
+    except (TypeError, ValueError):
+        return Fraction(0)
+
+
+class CacheLRU:
+    """
+    Caché acotada con política LRU (se desaloja el elemento usado hace más tiempo)
+    y segura para usarse desde varios hilos.
+    Lleva contadores de aciertos, fallos y desalojos para poder dimensionarla
+    según la carga real. Una capacidad de 0 desactiva la caché.
+    """
+    _FALTANTE = object()
+
+    def __init__(self, capacidad=1024):
+        if capacidad < 0:
+            raise ValueError(f"La capacidad de la caché no puede ser negativa: {capacidad}")
+        self._datos = OrderedDict()
+        self._capacidad = capacidad
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def __len__(self):
+        return len(self._datos)
+
+    def __contains__(self, clave):
+        with self._candado:
+            return clave in self._datos
+
+    def obtener(self, clave, por_defecto=None):
+        """Devuelve el valor guardado para la clave (y lo marca como reciente) o el valor por defecto."""
+        with self._candado:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            return por_defecto
+
+    def guardar(self, clave, valor):
+        """Guarda un valor, desalojando los menos usados si se supera la capacidad."""
+        with self._candado:
+            if self._capacidad == 0:
+                return
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            self._recortar()
+
+    def obtener_o_calcular(self, clave, calcular):
+        """
+        Devuelve el valor de la clave; si no está, lo calcula con calcular()
+        y lo guarda. El cálculo se hace fuera del candado para no bloquear a otros hilos.
+        """
+        valor = self.obtener(clave, self._FALTANTE)
+        if valor is self._FALTANTE:
+            valor = calcular()
+            self.guardar(clave, valor)
+        return valor
+
+    def redimensionar(self, capacidad):
+        """Cambia la capacidad en caliente; si se reduce, desaloja lo que sobre."""
+        if capacidad < 0:
+            raise ValueError(f"La capacidad de la caché no puede ser negativa: {capacidad}")
+        with self._candado:
+            self._capacidad = capacidad
+            self._recortar()
+
+    def limpiar(self):
+        """Vacía la caché y reinicia sus contadores."""
+        with self._candado:
+            self._datos.clear()
+            self.aciertos = self.fallos = self.desalojos = 0
+
+    def estadisticas(self):
+        """Devuelve un diccionario con el tamaño, la capacidad y los contadores de la caché."""
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            return {
+                'capacidad': self._capacidad,
+                'tamano': len(self._datos),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            }
+
+    def _recortar(self):
+        # Se asume que el candado ya está tomado
+        while len(self._datos) > self._capacidad:
+            self._datos.popitem(last=False)
+            self.desalojos += 1
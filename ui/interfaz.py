@@ -9,8 +9,9 @@ import numpy as _np
 
 # Importaciones absolutas (mantenidas)
 from modules.tabla_periodica import TablaPeriodica
-from modules.parser import parsear_ecuacion
-from modules.balanceo import BalanceadorEcuacion
+from modules.parser import parsear_ecuacion_completa
+from modules.balanceo import balancear_especies, con_subindices, formula_de_conteo
+from modules.cache_balanceo import CacheBalanceo
 # Asumo que estas constantes y funciones existen en modules/utils.py
 from modules.utils import NORMAL_TO_SUB, cargar_elementos, SUB_TO_NORMAL
 # Nuevo changelog/novedades (existía en la versión más nueva)
@@ -38,6 +39,9 @@ class Interfaz(tk.Tk):
         # Cargar datos para el tooltip (ambas versiones usan esto)
         self.df_elementos = cargar_elementos()
 
+        # Resultados de balanceo ya calculados (no depende del orden de las especies)
+        self.cache_balanceo = CacheBalanceo()
+
         # Inicializar layout y widgets
         self.crear_layout()
 
@@ -855,46 +859,44 @@ class Interfaz(tk.Tk):
         except Exception:
             pass
 
-        if not ecuacion_str or '→' not in ecuacion_str:
+        if not ecuacion_str:
             messagebox.showerror("Error de Formato", "Por favor, introduce una ecuación química válida con reactivos, flecha (→) y productos.")
             return
 
         try:
-            reactivos_str, productos_str = [s.strip() for s in ecuacion_str.split('→')]
-            reactivos = [parsear_ecuacion(s.strip()) for s in reactivos_str.split('+')]
-            productos = [parsear_ecuacion(s.strip()) for s in productos_str.split('+')]
-
-            balanceador = BalanceadorEcuacion(reactivos, productos)
+            especies_reactivos, especies_productos = parsear_ecuacion_completa(ecuacion_str)
+            # Mismo camino que balancear_texto: la caché guarda también el motivo y los bloques que fallan
+            resultado = balancear_especies(especies_reactivos, especies_productos, cache=self.cache_balanceo)
 
             self.output_text.insert(tk.END, "1. Asignamos variables:\n")
-            ecuacion_con_variables = balanceador.obtener_ecuacion_con_variables()
-            self.output_text.insert(tk.END, self.aplicar_subindices(ecuacion_con_variables) + "\n\n")
-
-            matriz, elementos = balanceador.construir_matriz()
+            self.output_text.insert(tk.END, self.aplicar_subindices(resultado.ecuacion_con_variables) + "\n\n")
 
             self.output_text.insert(tk.END, "2. Ecuaciones por elemento:\n")
-            for i, elem in enumerate(elementos):
-                ecuacion = balanceador.obtener_ecuacion_texto(elem, matriz[i])
+            for elem, ecuacion in resultado.pasos:
                 self.output_text.insert(tk.END, f"  {elem}: {ecuacion}\n")
             self.output_text.insert(tk.END, "\n")
 
-            coeficientes = balanceador.resolver()
-
             self.output_text.insert(tk.END, "3. Resolución del sistema:\n")
-            if not coeficientes:
+            if not resultado:
                 self.output_text.insert(tk.END, "  Error: No se encontró solución entera simple o la ecuación es trivial/inválida.\n")
+                if resultado.motivo is not None:
+                    self.output_text.insert(tk.END, f"  {resultado.motivo['mensaje']}\n")
+                compuestos = resultado.reactivos + resultado.productos
+                for especies in resultado.bloques_sin_solucion:
+                    formulas = ", ".join(formula_de_conteo(compuestos[j]) for j in especies)
+                    self.output_text.insert(tk.END, f"  El subsistema formado por {self.aplicar_subindices(formulas)} no se puede balancear.\n")
+                if resultado.estado == 'presupuesto_agotado':
+                    self.output_text.insert(tk.END, "  (La búsqueda de la solución mínima agotó su presupuesto de tiempo.)\n")
                 return
 
-            self.output_text.insert(tk.END, f"  Coeficientes fraccionarios/decimales: {coeficientes}\n")
-
-            coeficientes_enteros = balanceador.minimizar_coeficientes(coeficientes)
-            self.output_text.insert(tk.END, f"  Coeficientes enteros mínimos: {coeficientes_enteros}\n\n")
-
-            ecuacion_balanceada = balanceador.formatear_ecuacion_balanceada(coeficientes_enteros)
-            ecuacion_sub = self.aplicar_subindices(ecuacion_balanceada)
+            if resultado.busqueda_agotada:
+                self.output_text.insert(tk.END, f"  Coeficientes enteros: {list(resultado.coeficientes)}\n")
+                self.output_text.insert(tk.END, "  (La búsqueda agotó su presupuesto de tiempo: balancean la ecuación, pero puede existir una solución menor.)\n\n")
+            else:
+                self.output_text.insert(tk.END, f"  Coeficientes enteros mínimos: {list(resultado.coeficientes)}\n\n")
 
             self.output_text.insert(tk.END, "4. Ecuación Balanceada:\n")
-            self.output_text.insert(tk.END, f"  {ecuacion_sub}", ('balanceada',))
+            self.output_text.insert(tk.END, f"  {resultado.ecuacion_subindices}", ('balanceada',))
             self.output_text.tag_config('balanceada', font=('Consolas', 12, 'bold'), foreground="#0D47A1")
 
         except ValueError as e:
@@ -920,8 +922,8 @@ class Interfaz(tk.Tk):
             if match:
                 coef = match.group(1)
                 mol = match.group(2)
-                mol_subscripted = mol.translate(NORMAL_TO_SUB)
-                resultado.append(coef + mol_subscripted)
+                # La carga (ej: '^2+') queda como está
+                resultado.append(coef + con_subindices(mol))
             else:
                 resultado.append(parte)
         return " ".join(resultado)